@@ -45,9 +45,11 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "users.middleware.SessionBackendMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "users.middleware.RequestMemoMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -73,6 +75,12 @@ TEMPLATES = [
 WSGI_APPLICATION = "banshee.wsgi.application"
 
 
+# Authentication
+# Sessions started under ModelBackend are moved over by SessionBackendMiddleware
+
+AUTHENTICATION_BACKENDS = ["users.backends.SeniorBackend"]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
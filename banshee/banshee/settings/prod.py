@@ -15,6 +15,9 @@ DATABASES = {
     }
 }
 
+# Must be shared between workers, rendered schedules are invalidated through it
+CACHES = {"default": env.cache(default="dbcache://banshee_cache")}
+
 ALLOWED_HOSTS = env.list("ALLOWED_HOSTS")
 CSRF_TRUSTED_ORIGINS = env.list("CSRF_TRUSTED_ORIGINS")
 
@@ -0,0 +1,63 @@
+import threading
+import time
+
+from django.core.cache import cache
+
+# Version numbers in the shared cache let every process tell when data it
+# keeps a copy of (in memory or as cached fragments) has changed. Reading one
+# can itself cost a query (DatabaseCache), so each thread remembers the
+# versions it has read. users.middleware forgets them at the start of every
+# request, so a request reads each version at most once, and outside
+# requests a version is trusted for CHECK_INTERVAL seconds
+VERSION_TIMEOUT = None  # Versions never expire
+CHECK_INTERVAL = 5
+
+checked = threading.local()
+
+
+def get_version_key(name: str):
+    return f"training:version:{name}"
+
+
+def get_checked_versions():
+    if not hasattr(checked, "versions"):
+        checked.versions = {}  # name -> (version, monotonic time read)
+    return checked.versions
+
+
+def clear_checked_versions():
+    checked.versions = {}
+
+
+def read_version(name: str):
+    key = get_version_key(name)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock instead of 1 so a version that was evicted can
+        # never line up with fragments that are still cached under it
+        version = time.time_ns()
+        if not cache.add(key, version, VERSION_TIMEOUT):
+            version = cache.get(key, version)
+    return version
+
+
+def get_version(name: str):
+    versions = get_checked_versions()
+    if name in versions:
+        version, read_at = versions[name]
+        if time.monotonic() - read_at < CHECK_INTERVAL:
+            return version
+    version = read_version(name)
+    versions[name] = (version, time.monotonic())
+    return version
+
+
+# The bumping thread sees its own change straight away, others on their
+# next request
+def bump_version(name: str):
+    try:
+        version = cache.incr(get_version_key(name))
+    except ValueError:  # Key is missing, any fresh version is newer
+        version = read_version(name)
+    get_checked_versions()[name] = (version, time.monotonic())
+    return version
@@ -8,7 +8,9 @@ admin.site.register(EmptyLesson)
 admin.site.register(Lesson)
 admin.site.register(Activity)
 admin.site.register(Teach)
+admin.site.register(TeachGroup)
 admin.site.register(MapSeniorTeach)
 admin.site.register(MapSeniorNight)
 admin.site.register(TrainingPeriod)
 admin.site.register(TrainingNight)
+admin.site.register(NightTemplate)
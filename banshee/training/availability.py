@@ -0,0 +1,148 @@
+from datetime import date
+
+from .models import (
+    MapSeniorNight,
+    MapSeniorTeach,
+    Senior,
+    Teach,
+    TrainingNight,
+    TrainingPeriod,
+)
+
+
+class AvailabilityMatrix:
+    """
+    Occupancy of every senior for every night and period between two dates,
+    loaded in a fixed number of queries. Each cell is a byte of flags, stored
+    row by row (one row per senior) in a bytearray.
+    """
+
+    NIGHT_ROLE = 1  # Holds a MapSeniorNight role that night
+    TEACHING = 2  # Teaches that night / in that period
+    EXCUSED = 4  # In TrainingNight.excused
+
+    def __init__(self, start: date, end: date):
+        self.start = start
+        self.end = end
+
+        self.seniors = list(Senior.seniors.select_related("user"))
+        self.nights = list(
+            TrainingNight.objects.filter(date__range=(start, end)).order_by("date")
+        )
+        self.periods = list(
+            TrainingPeriod.objects.filter(night__in=self.nights).order_by(
+                "night__date", "order"
+            )
+        )
+
+        self.senior_index = {senior.id: i for i, senior in enumerate(self.seniors)}
+        self.night_index = {night.id: i for i, night in enumerate(self.nights)}
+        self.period_index = {period.id: i for i, period in enumerate(self.periods)}
+        self.period_nights = {period.id: period.night_id for period in self.periods}
+
+        self.night_cells = bytearray(len(self.seniors) * len(self.nights))
+        self.period_cells = bytearray(len(self.seniors) * len(self.periods))
+        self.roles = {senior.id: [] for senior in self.seniors}
+
+        self.load_excused()
+        self.load_night_roles()
+        self.load_teach_roles()
+
+    # Loading
+    def load_excused(self):
+        through = TrainingNight.excused.through
+        rows = through.objects.filter(trainingnight__in=self.nights).values_list(
+            "senior_id", "trainingnight_id"
+        )
+        for senior_id, night_id in rows:
+            self.mark_night(senior_id, night_id, self.EXCUSED)
+
+    def load_night_roles(self):
+        rows = MapSeniorNight.objects.filter(night__in=self.nights).values_list(
+            "senior_id", "night_id", "role"
+        )
+        for senior_id, night_id, role in rows:
+            self.mark_night(senior_id, night_id, self.NIGHT_ROLE)
+            self.add_role(senior_id, night_id, role)
+
+    def load_teach_roles(self):
+        # Assignments hang off the parent teach, but the senior is busy in
+        # every period the teach group covers
+        group_periods = {}
+        instances = Teach.objects.filter(period__in=self.periods).values_list(
+            "group_id", "period_id"
+        )
+        for teach_id, period_id in instances:
+            group_periods.setdefault(teach_id, set()).add(period_id)
+
+        rows = MapSeniorTeach.objects.filter(
+            teach__period__in=self.periods
+        ).values_list("senior_id", "teach__group_id", "teach__period__night_id", "role")
+        for senior_id, teach_id, night_id, role in rows:
+            self.mark_night(senior_id, night_id, self.TEACHING)
+            for period_id in group_periods.get(teach_id, ()):
+                self.mark_period(senior_id, period_id, self.TEACHING)
+            self.add_role(senior_id, night_id, role)
+
+    # Updating cells
+    def mark_night(self, senior_id: int, night_id: int, flag: int):
+        if senior_id in self.senior_index and night_id in self.night_index:
+            row = self.senior_index[senior_id] * len(self.nights)
+            self.night_cells[row + self.night_index[night_id]] |= flag
+
+    def mark_period(self, senior_id: int, period_id: int, flag: int):
+        if senior_id in self.senior_index and period_id in self.period_index:
+            row = self.senior_index[senior_id] * len(self.periods)
+            self.period_cells[row + self.period_index[period_id]] |= flag
+
+    def add_role(self, senior_id: int, night_id: int, role: str):
+        if senior_id in self.roles:
+            self.roles[senior_id].append((night_id, role))
+
+    # Lookups
+    def get_night_flags(self, senior_id: int, night_id: int):
+        row = self.senior_index[senior_id] * len(self.nights)
+        return self.night_cells[row + self.night_index[night_id]]
+
+    def get_period_flags(self, senior_id: int, period_id: int):
+        row = self.senior_index[senior_id] * len(self.periods)
+        return self.period_cells[row + self.period_index[period_id]]
+
+    def is_free_for_night(self, senior_id: int, night_id: int):
+        return self.get_night_flags(senior_id, night_id) == 0
+
+    def is_free_for_period(self, senior_id: int, period_id: int):
+        night_id = self.period_nights[period_id]
+        night_flags = self.get_night_flags(senior_id, night_id)
+        if night_flags & (self.NIGHT_ROLE | self.EXCUSED):
+            return False
+        return not self.get_period_flags(senior_id, period_id) & self.TEACHING
+
+    # Same rules as Senior.seniors.get_assignable_for_night/period, plus excusals
+    def get_free_for_night(self, night_id: int):
+        return [
+            senior
+            for senior in self.seniors
+            if not senior.discluded_assignment
+            and self.is_free_for_night(senior.id, night_id)
+        ]
+
+    def get_free_for_period(self, period_id: int):
+        return [
+            senior
+            for senior in self.seniors
+            if not senior.discluded_assignment
+            and self.is_free_for_period(senior.id, period_id)
+        ]
+
+    def get_load(self, senior_id: int):
+        row = self.senior_index[senior_id] * len(self.nights)
+        cells = self.night_cells[row : row + len(self.nights)]
+        return sum(1 for flags in cells if flags & (self.NIGHT_ROLE | self.TEACHING))
+
+    def get_senior_schedule(self, senior_id: int):
+        nights = {night.id: night for night in self.nights}
+        schedule = [
+            (nights[night_id], role) for night_id, role in self.roles[senior_id]
+        ]
+        return sorted(schedule, key=lambda entry: entry[0].date)
@@ -0,0 +1,51 @@
+from banshee.versions import bump_version, get_version
+
+# Cached fragments embed a version number in their key, so bumping the version
+# makes every fragment built from older data unreachable without deleting it
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+
+# Night Schedules
+def get_night_version(night_id: int):
+    return get_version(f"night:{night_id}")
+
+
+def bump_night_versions(night_ids):
+    for night_id in set(night_ids):
+        bump_version(f"night:{night_id}")
+
+
+# Dashboard Calendars
+def get_month_version(year: int, month: int):
+    return get_version(f"month:{year}-{month}")
+
+
+def bump_month_version(year: int, month: int):
+    bump_version(f"month:{year}-{month}")
+
+
+# Lesson catalogue
+def get_lesson_version():
+    return get_version("lessons")
+
+
+def bump_lesson_version():
+    bump_version("lessons")
+
+
+# Level registry
+def get_level_version():
+    return get_version("levels")
+
+
+def bump_level_version():
+    bump_version("levels")
+
+
+# Senior directory
+def get_senior_version():
+    return get_version("seniors")
+
+
+def bump_senior_version():
+    bump_version("seniors")
@@ -0,0 +1,84 @@
+from bisect import bisect_left
+
+from . import caches
+from .models import Lesson
+
+
+class LessonIndex:
+    """
+    Prefix index over every Lesson's eocode and title words. It is loaded
+    once per process and reloaded when the lesson version in the shared
+    cache moves. The version is read at most once per request, so a lookup
+    is usually just a bisect.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.lessons = {}  # Upper case eocode -> (eocode, title, po_title)
+        self.codes = []  # Sorted lower case eocodes
+        self.words = []  # Sorted (title word, eocode)
+
+    def load(self):
+        lessons = {}
+        words = []
+        rows = Lesson.objects.values_list("eocode", "title", "po__po_title")
+        for eocode, title, po_title in rows:
+            lessons[eocode.upper()] = (eocode, title, po_title)
+            for word in set(title.lower().split()):
+                words.append((word, eocode))
+
+        # Swapped in together so a concurrent search never mixes two loads
+        self.lessons, self.codes, self.words = (
+            lessons,
+            sorted(eocode.lower() for eocode, title, po_title in lessons.values()),
+            sorted(words),
+        )
+
+    def refresh(self):
+        version = caches.get_lesson_version()
+        if version != self.version:
+            self.load()
+            self.version = version
+
+    def get(self, eocode: str):
+        self.refresh()
+        return self.lessons.get(eocode.strip().upper())
+
+    # Eocode matches first (an exact code sorts before anything it prefixes),
+    # then lessons with a title word starting with each word of the query
+    def search(self, query: str, limit: int = 10):
+        self.refresh()
+        query = query.strip().lower()
+        if query.startswith("eo "):
+            query = query[3:]
+        if not query:
+            return []
+
+        matches = []
+        index = bisect_left(self.codes, query)
+        while index < len(self.codes) and len(matches) < limit:
+            if not self.codes[index].startswith(query):
+                break
+            matches.append(self.codes[index].upper())
+            index += 1
+
+        first, *rest = query.split()
+        index = bisect_left(self.words, (first,))
+        while index < len(self.words) and len(matches) < limit:
+            word, eocode = self.words[index]
+            if not word.startswith(first):
+                break
+            index += 1
+            if eocode.upper() in matches:
+                continue
+            title_words = self.lessons[eocode.upper()][1].lower().split()
+            if all(
+                any(title_word.startswith(part) for title_word in title_words)
+                for part in rest
+            ):
+                matches.append(eocode.upper())
+
+        return [self.lessons[eocode] for eocode in matches]
+
+
+lesson_index = LessonIndex()
@@ -0,0 +1,232 @@
+from django.db import transaction
+
+from . import caches
+from .models import (
+    Lesson,
+    Level,
+    MapSeniorNight,
+    MapSeniorTeach,
+    PerformanceObjective,
+    Senior,
+    Teach,
+    TeachGroup,
+    TrainingNight,
+    TrainingPeriod,
+)
+
+
+class NightCopier:
+    """
+    Recreates a night's periods, teach groups, content and roles on any
+    number of dates. The structure is plain JSON (content is stored by its
+    form fields, seniors and levels by id) so it can be kept in a
+    NightTemplate. Copies are made with bulk inserts, in a fixed number of
+    queries however many dates there are.
+    """
+
+    CONTENT_CLASSES = {
+        content_class.__name__: content_class
+        for content_class in Teach.CONTENT_CLASSES + [Teach.DEFAULT_CONTENT_CLASS]
+    }
+
+    def __init__(self, structure: dict):
+        self.structure = structure
+
+    @classmethod
+    def from_night(cls, night: TrainingNight):
+        return cls(cls.get_structure(night))
+
+    @staticmethod
+    def get_structure(night: TrainingNight):
+        teachs = (
+            Teach.objects.filter(period__night=night)
+            .select_related("group", "period")
+            .prefetch_related("group__content", "mapseniorteach_set")
+            .order_by("id")
+        )
+
+        groups = {}
+        for teach in teachs:
+            if teach.group_id not in groups:
+                # The first instance is the parent and holds the assignments
+                content = teach.group.content or Teach.DEFAULT_CONTENT_CLASS()
+                groups[teach.group_id] = {
+                    "content": [type(content).__name__, content.get_form_initial()],
+                    "location": teach.group.location,
+                    "slots": [],
+                    "roles": [
+                        [assignment.senior_id, assignment.role]
+                        for assignment in teach.mapseniorteach_set.all()
+                    ],
+                }
+            groups[teach.group_id]["slots"].append([teach.period.order, teach.level_id])
+
+        night_roles = MapSeniorNight.objects.filter(night=night).values_list(
+            "senior_id", "role"
+        )
+        return {
+            "periods": list(night.get_periods().values_list("order", flat=True)),
+            "groups": list(groups.values()),
+            "night_roles": [list(role) for role in night_roles],
+        }
+
+    # Lessons are reused by eocode, so every copy shares the one already in
+    # the catalogue as it is and only missing ones are created, under the
+    # title the structure was saved with. Returns None for other content
+    def get_lessons(self):
+        titles = {}
+        for group in self.structure["groups"]:
+            name, fields = group["content"]
+            if self.CONTENT_CLASSES[name] == Lesson:
+                titles.setdefault(fields["eocode"], fields["title"])
+
+        lessons = Lesson.objects.in_bulk(list(titles), field_name="eocode")
+        missing = [eocode for eocode in titles if eocode not in lessons]
+        if missing:
+            # Both are unique, so rows another request added meanwhile are
+            # skipped and read back with the rest
+            PerformanceObjective.objects.bulk_create(
+                [PerformanceObjective(po=po) for po in {code[1:4] for code in missing}],
+                ignore_conflicts=True,
+            )
+            objectives = PerformanceObjective.objects.in_bulk(
+                [eocode[1:4] for eocode in missing], field_name="po"
+            )
+            Lesson.objects.bulk_create(
+                [
+                    Lesson(
+                        eocode=eocode,
+                        title=titles[eocode],
+                        po=objectives[eocode[1:4]],
+                    )
+                    for eocode in missing
+                ],
+                ignore_conflicts=True,
+            )
+            lessons = Lesson.objects.in_bulk(list(titles), field_name="eocode")
+            # bulk_create skips the signals that invalidate the lesson index
+            transaction.on_commit(caches.bump_lesson_version)
+
+        return [
+            lessons[group["content"][1]["eocode"]]
+            if self.CONTENT_CLASSES[group["content"][0]] == Lesson
+            else None
+            for group in self.structure["groups"]
+        ]
+
+    # Gives every copied group without a Lesson its own disposable content,
+    # which takes the group's id as both come from TeachIdAllocator
+    def create_disposable_contents(self, groups: list):
+        contents = {}
+        for group, data in groups:
+            if group.object_id != None:
+                continue
+            name, fields = data["content"]
+            content_class = self.CONTENT_CLASSES[name]
+            group.content = content_class(id=group.id, **fields)
+            contents.setdefault(content_class, []).append(group.content)
+
+        for content_class, instances in contents.items():
+            content_class.objects.bulk_create(instances, batch_size=500)
+
+    def create(self, dates: list, assignments: bool = False):
+        structure = self.structure
+
+        with transaction.atomic():
+            existing = TrainingNight.objects.filter(date__in=dates).values_list(
+                "date", flat=True
+            )
+            dates = sorted(set(dates) - set(existing))
+            if not dates:
+                return []
+
+            TrainingNight.objects.bulk_create(
+                [TrainingNight(date=day) for day in dates]
+            )
+            nights = list(TrainingNight.objects.filter(date__in=dates).order_by("date"))
+
+            TrainingPeriod.objects.bulk_create(
+                [
+                    TrainingPeriod(night=night, order=order)
+                    for night in nights
+                    for order in structure["periods"]
+                ]
+            )
+            periods = {
+                (period.night_id, period.order): period
+                for period in TrainingPeriod.objects.filter(night__in=nights)
+            }
+
+            # Slots of levels deleted since the structure was saved are dropped
+            level_ids = Level.get_registry().ids
+            lessons = self.get_lessons()
+            teach_ids = iter(
+                Teach.get_next_teach_ids(len(structure["groups"]) * len(nights))
+            )
+
+            groups = []
+            teachs = []
+            for night in nights:
+                for data, lesson in zip(structure["groups"], lessons):
+                    group = TeachGroup(id=next(teach_ids), location=data["location"])
+                    if lesson != None:
+                        group.content = lesson
+                    groups.append((group, data))
+                    for order, level_id in data["slots"]:
+                        if level_id in level_ids:
+                            teachs.append(
+                                Teach(
+                                    group=group,
+                                    level_id=level_id,
+                                    period=periods[(night.id, order)],
+                                )
+                            )
+
+            self.create_disposable_contents(groups)
+            TeachGroup.objects.bulk_create(
+                [group for group, data in groups], batch_size=500
+            )
+            Teach.objects.bulk_create(teachs, batch_size=500)
+
+            if assignments:
+                self.create_roles(nights, groups)
+
+        # bulk_create skips the signals that invalidate cached calendars
+        for year, month in {(night.date.year, night.date.month) for night in nights}:
+            caches.bump_month_version(year, month)
+        return nights
+
+    def create_roles(self, nights: list, groups: list):
+        senior_ids = set(Senior.objects.values_list("id", flat=True))
+
+        MapSeniorNight.objects.bulk_create(
+            [
+                MapSeniorNight(night=night, senior_id=senior_id, role=role)
+                for night in nights
+                for senior_id, role in self.structure["night_roles"]
+                if senior_id in senior_ids
+            ]
+        )
+
+        # Teaches were inserted parent first, read back their ids
+        parents = {}
+        instances = (
+            Teach.objects.filter(group_id__in=[group.id for group, data in groups])
+            .order_by("id")
+            .values_list("id", "group_id")
+        )
+        for pk, group_id in instances:
+            parents.setdefault(group_id, pk)
+
+        MapSeniorTeach.objects.bulk_create(
+            [
+                MapSeniorTeach(
+                    teach_id=parents[group.id], senior_id=senior_id, role=role
+                )
+                for group, data in groups
+                if group.id in parents
+                for senior_id, role in data["roles"]
+                if senior_id in senior_ids
+            ],
+            batch_size=500,
+        )
@@ -0,0 +1,148 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+
+from . import caches
+from .forms import LessonTeachForm
+from .models import Lesson, PerformanceObjective
+
+
+class CurriculumImporter:
+    """
+    Upserts Lessons and PerformanceObjectives from a stream of rows with
+    eocode, title and optionally po and po_title keys. Rows are read lazily
+    and written a chunk at a time with bulk inserts and updates, so a whole
+    curriculum costs a handful of queries per chunk instead of several per
+    lesson like Lesson.create.
+    """
+
+    def __init__(self, chunk_size: int = 1000, dry_run: bool = False):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.counts = {
+            "inserted": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "skipped": 0,
+            "objectives inserted": 0,
+            "objectives updated": 0,
+        }
+
+    # Readers
+    @staticmethod
+    def read_csv(file):
+        for row in csv.DictReader(file):
+            yield row
+
+    @staticmethod
+    def read_jsonl(file):
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+    # Importing, yields the running counts after every chunk
+    def import_rows(self, rows):
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return
+            self.import_chunk(chunk)
+            yield self.counts
+
+    def clean_row(self, row: dict):
+        eocode = (row.get("eocode") or "").strip()
+        title = (row.get("title") or "").strip()
+        if LessonTeachForm.EXTENDED_EOCODE_REGEX.match(eocode):
+            eocode = eocode[3:]
+        if not LessonTeachForm.EOCODE_REGEX.match(eocode) or not title:
+            return None
+
+        po = (row.get("po") or "").strip() or eocode[1:4]
+        po_title = (row.get("po_title") or "").strip() or None
+
+        # Values too long for their columns would fail the whole chunk
+        columns = [
+            (Lesson, "title", title),
+            (PerformanceObjective, "po", po),
+            (PerformanceObjective, "po_title", po_title or ""),
+        ]
+        for model, field, value in columns:
+            if len(value) > model._meta.get_field(field).max_length:
+                return None
+        return {"eocode": eocode, "title": title, "po": po, "po_title": po_title}
+
+    def import_chunk(self, chunk: list):
+        lessons = {}
+        for row in chunk:
+            row = self.clean_row(row)
+            if row == None:
+                self.counts["skipped"] += 1
+                continue
+            lessons[row["eocode"]] = row  # Later rows win
+
+        with transaction.atomic():
+            objectives = self.upsert_objectives(lessons.values())
+            self.upsert_lessons(lessons.values(), objectives)
+            if self.dry_run:
+                transaction.set_rollback(True)
+
+        # Bulk writes skip the signals that refresh catalogue.lesson_index
+        if not self.dry_run:
+            caches.bump_lesson_version()
+
+    def upsert_objectives(self, rows):
+        titles = {}
+        for row in rows:
+            if row["po_title"] or row["po"] not in titles:
+                titles[row["po"]] = row["po_title"]
+
+        existing = PerformanceObjective.objects.in_bulk(list(titles), field_name="po")
+        new = [
+            PerformanceObjective(po=po, po_title=po_title)
+            for po, po_title in titles.items()
+            if po not in existing
+        ]
+        changed = []
+        for po, objective in existing.items():
+            if titles[po] and objective.po_title != titles[po]:
+                objective.po_title = titles[po]
+                changed.append(objective)
+
+        PerformanceObjective.objects.bulk_create(new)
+        PerformanceObjective.objects.bulk_update(changed, ["po_title"])
+        self.counts["objectives inserted"] += len(new)
+        self.counts["objectives updated"] += len(changed)
+
+        # Read back so new objectives have ids on every database
+        if new:
+            return PerformanceObjective.objects.in_bulk(list(titles), field_name="po")
+        return existing
+
+    # Schedules only show eocodes, so cached fragments don't need bumping
+    def upsert_lessons(self, rows, objectives: dict):
+        rows = list(rows)
+        existing = Lesson.objects.in_bulk(
+            [row["eocode"] for row in rows], field_name="eocode"
+        )
+
+        new = []
+        changed = []
+        for row in rows:
+            po = objectives[row["po"]]
+            instance = existing.get(row["eocode"])
+            if instance == None:
+                new.append(Lesson(eocode=row["eocode"], title=row["title"], po=po))
+            elif instance.title != row["title"] or instance.po_id != po.id:
+                instance.title = row["title"]
+                instance.po = po
+                changed.append(instance)
+            else:
+                self.counts["unchanged"] += 1
+
+        Lesson.objects.bulk_create(new)
+        Lesson.objects.bulk_update(changed, ["title", "po"])
+        self.counts["inserted"] += len(new)
+        self.counts["updated"] += len(changed)
@@ -0,0 +1,64 @@
+from collections import namedtuple
+
+from . import caches
+from .models import Senior
+
+from users.models import TrainingSetting
+
+SeniorEntry = namedtuple("SeniorEntry", ["id", "name", "level", "permission"])
+
+
+class SeniorDirectory:
+    """
+    Every senior as an (id, username, level name, permission level) tuple,
+    read with one joined query. Like catalogue.LessonIndex it is loaded once
+    per process and reloaded when the senior version in the shared cache
+    moves, which Senior and User saves and deletes bump.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.entries = ()
+
+    def load(self):
+        rows = Senior.objects.filter(user__isnull=False).values_list(
+            "id", "user__username", "level__name", "permission_level"
+        )
+        self.entries = tuple(SeniorEntry(*row) for row in rows)
+
+    def refresh(self):
+        version = caches.get_senior_version()
+        if version != self.version:
+            self.load()
+            self.version = version
+
+    def get_entries(self):
+        self.refresh()
+        return self.entries
+
+    # Same rules as Senior.seniors and Senior.instructors
+    def get_seniors(self):
+        return [
+            entry
+            for entry in self.get_entries()
+            if entry.permission <= Senior.TRAINING_MANAGER
+        ]
+
+    def get_instructors(self):
+        if TrainingSetting.get_senior_assignment():
+            return self.get_seniors()
+        return [
+            entry
+            for entry in self.get_entries()
+            if entry.permission == Senior.STANDARD_INSTRUCTOR
+        ]
+
+    # Choices for the senior dropdowns
+    def get_senior_choices(self):
+        return [(entry.id, entry.name) for entry in self.get_seniors()]
+
+    def get_instructor_choices(self):
+        return [(entry.id, entry.name) for entry in self.get_instructors()]
+
+
+senior_directory = SeniorDirectory()
@@ -1,9 +1,13 @@
 from django import forms
 from django.forms import inlineformset_factory, ModelForm, BaseInlineFormSet
+from django.db import transaction
 from django.db.models.fields import BLANK_CHOICE_DASH
 from django.core.exceptions import ValidationError
 
 import re
+from abc import ABCMeta, abstractmethod
+import calendar
+from datetime import date
 
 from .models import (
     Activity,
@@ -13,10 +17,16 @@ from .models import (
     TrainingNight,
     EmptyLesson,
     Teach,
+    TeachGroup,
     MapSeniorTeach,
     MapSeniorNight,
+    NightTemplate,
 )
 from users.models import TrainingSetting
+from .utils import SlotMatrix, get_recurring_dates
+from .cloning import NightCopier
+from .catalogue import lesson_index
+from . import caches
 
 
 # Edit Senior Form
@@ -36,34 +46,43 @@ class AssignTeachForm(ModelForm):
         teach_id: int,
         senior_choices: list,
         parent_instance,
+        formset,
         **kwargs,
     ):
         super(AssignTeachForm, self).__init__(*args, **kwargs)
 
         self.teach_id = teach_id
         self.parent_instance = parent_instance
+        self.formset = formset
+        if self.instance.pk != None:
+            # As posted back, so unchanged rows report has_changed() False
+            self.initial.setdefault("senior", str(self.instance.senior_id))
         self.fields["senior"].choices = (
             self.BLANK_CHOICE_SENIOR + self.BLANK_CHOICE_DASH + senior_choices
         )
 
+    # The senior is checked against the formset's lookup and set in clean, so
+    # it's left out here to skip the model's existence query for every form
     class Meta:
         model = MapSeniorTeach
-        fields = ["role", "senior"]
+        fields = ["role"]
 
     def clean(self):
         cleaned_data = self.cleaned_data
         senior_id = cleaned_data.get("senior")
-        senior_instance = Senior.seniors.get_by_id(senior_id)
-        cleaned_data.update({"senior": senior_instance})
+        if not senior_id:  # Already has a field error
+            return cleaned_data
 
-        senior_assignment_setting = TrainingSetting.get_senior_assignment()
+        # Looked up with every other form's senior in one query
+        senior_instance = self.formset.get_senior(senior_id)
+        cleaned_data.update({"senior": senior_instance})
+        self.instance.senior = senior_instance
 
-        if senior_assignment_setting:
-            if senior_instance.permission_level > 2:
-                raise ValidationError({"senior": "You can't assign this senior."})
-        else:
-            if senior_instance.permission_level > 1:
-                raise ValidationError({"senior": "You can't assign this senior."})
+        if (
+            senior_instance == None
+            or senior_instance.permission_level > self.formset.get_max_permission()
+        ):
+            raise ValidationError({"senior": "You can't assign this senior."})
 
         return cleaned_data
 
@@ -75,28 +94,227 @@ class AssignNightForm(AssignTeachForm):
         night_id,
         senior_choices,
         parent_instance,
+        formset,
         **kwargs,
     ):
         ModelForm.__init__(self, *args, **kwargs)
 
         self.night_id = night_id
         self.parent_instance = parent_instance
+        self.formset = formset
+        if self.instance.pk != None:
+            self.initial.setdefault("senior", str(self.instance.senior_id))
         self.fields["senior"].choices = (
             self.BLANK_CHOICE_SENIOR + self.BLANK_CHOICE_DASH + senior_choices
         )
 
     class Meta:
         model = MapSeniorNight
-        fields = ["role", "senior"]
+        fields = ["role"]
+
+
+class LoadedInstanceField(forms.ModelChoiceField):
+    """
+    Hidden id field for formsets that resolves ids from the instances the
+    formset has already loaded, instead of a query for every form.
+    """
+
+    def __init__(self, instances: dict, *args, **kwargs):
+        super(LoadedInstanceField, self).__init__(*args, **kwargs)
+        self.instances = instances
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.instances[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(
+                self.error_messages["invalid_choice"], code="invalid_choice"
+            )
+
+
+class BaseAssignFormset(BaseInlineFormSet, metaclass=ABCMeta):
+    """
+    Validates all of its forms against one lookup of the submitted seniors and
+    one read of the senior assignment setting, rejects seniors booked twice in
+    the night, and saves every change with bulk queries. Subclasses say what
+    a senior can already be booked for and which night the roles are on.
+    """
+
+    DOUBLE_BOOKED_ERROR = "This senior is already booked at this time."
+    DUPLICATE_ERROR = "This senior is assigned more than once."
+
+    def __init__(self, *args, **kwargs):
+        super(BaseAssignFormset, self).__init__(*args, **kwargs)
+        self.instances = None
+        self.seniors = None
+        self.max_permission = None
+
+    def get_form_kwargs(self, index):
+        kwargs = super(BaseAssignFormset, self).get_form_kwargs(index)
+        kwargs["formset"] = self
+        return kwargs
+
+    def add_fields(self, form, index):
+        super(BaseAssignFormset, self).add_fields(form, index)
+        if self.instances == None:
+            self.instances = {instance.pk: instance for instance in self.get_queryset()}
+        field = form.fields[self._pk_field.name]
+        form.fields[self._pk_field.name] = LoadedInstanceField(
+            self.instances,
+            field.queryset,
+            initial=field.initial,
+            required=False,
+            widget=field.widget,
+        )
+
+    def get_submitted_senior_ids(self):
+        senior_ids = []
+        for i in range(self.total_form_count()):
+            value = self.data.get(f"{self.add_prefix(i)}-senior", "")
+            if value.isdigit():
+                senior_ids.append(int(value))
+        return senior_ids
+
+    def get_senior(self, senior_id):
+        if self.seniors == None:
+            self.seniors = Senior.seniors.in_bulk(self.get_submitted_senior_ids())
+        return self.seniors.get(int(senior_id))
+
+    def get_max_permission(self):
+        if self.max_permission == None:
+            if TrainingSetting.get_senior_assignment():
+                self.max_permission = Senior.TRAINING_MANAGER
+            else:
+                self.max_permission = Senior.STANDARD_INSTRUCTOR
+        return self.max_permission
+
+    # Ids of the given seniors who are already busy elsewhere
+    @abstractmethod
+    def get_booked_senior_ids(self, senior_ids: list):
+        pass
+
+    @abstractmethod
+    def get_night_id(self):
+        pass
+
+    def get_kept_forms(self):
+        return [
+            form
+            for form in self.forms
+            if form.has_changed() or form.instance.pk != None
+            if not self._should_delete_form(form)
+        ]
+
+    # Only changed forms are checked, so existing clashes don't block a save
+    def clean(self):
+        super(BaseAssignFormset, self).clean()
+
+        forms = [
+            form
+            for form in self.get_kept_forms()
+            if isinstance(form.cleaned_data.get("senior"), Senior)
+        ]
+        counts = {}
+        for form in forms:
+            senior_id = form.cleaned_data["senior"].id
+            counts[senior_id] = counts.get(senior_id, 0) + 1
+
+        changed = [form for form in forms if form.has_changed()]
+        booked = self.get_booked_senior_ids(
+            [form.cleaned_data["senior"].id for form in changed]
+        )
+        for form in changed:
+            senior_id = form.cleaned_data["senior"].id
+            if counts[senior_id] > 1:
+                form.add_error("senior", self.DUPLICATE_ERROR)
+            elif senior_id in booked:
+                form.add_error("senior", self.DOUBLE_BOOKED_ERROR)
+
+    # Always commits, the views never save assignments separately
+    def save(self):
+        deleted_forms = self.deleted_forms
+        self.deleted_objects = [
+            form.instance for form in deleted_forms if form.instance.pk != None
+        ]
+        self.changed_objects = [
+            (form.instance, form.changed_data)
+            for form in self.initial_forms
+            if form.has_changed() and form not in deleted_forms
+        ]
+        self.new_objects = [
+            form.instance
+            for form in self.extra_forms
+            if form.has_changed() and form not in deleted_forms
+        ]
+        changed = [instance for instance, fields in self.changed_objects]
+
+        with transaction.atomic():
+            self.model.objects.filter(
+                pk__in=[instance.pk for instance in self.deleted_objects]
+            ).delete()
+            self.model.objects.bulk_update(changed, ["role", "senior"])
+            self.model.objects.bulk_create(self.new_objects)
+
+        # After the commit, so no render can cache the old roles under the
+        # new version. Bulk queries skip the signals that would do this
+        if self.deleted_objects or changed or self.new_objects:
+            caches.bump_night_versions([self.get_night_id()])
+        return changed + self.new_objects
+
+
+class BaseAssignTeachFormset(BaseAssignFormset):
+    # Night roles, or a teach in any period this group runs in
+    def get_booked_senior_ids(self, senior_ids: list):
+        if not senior_ids:
+            return set()
+        group_id = self.instance.group_id
+        night_roles = MapSeniorNight.objects.filter(
+            night__trainingperiod__teach__group_id=group_id, senior_id__in=senior_ids
+        ).values_list("senior_id", flat=True)
+        teachs = (
+            MapSeniorTeach.objects.filter(
+                teach__period__teach__group_id=group_id, senior_id__in=senior_ids
+            )
+            .exclude(teach__group_id=group_id)
+            .values_list("senior_id", flat=True)
+        )
+        return set(night_roles.union(teachs))
+
+    def get_night_id(self):
+        return self.instance.get_night_id()
+
+
+class BaseAssignNightFormset(BaseAssignFormset):
+    # A night role can't be held while teaching anywhere in the night
+    def get_booked_senior_ids(self, senior_ids: list):
+        if not senior_ids:
+            return set()
+        teachs = MapSeniorTeach.objects.filter(
+            teach__period__night=self.instance, senior_id__in=senior_ids
+        ).values_list("senior_id", flat=True)
+        return set(teachs)
+
+    def get_night_id(self):
+        return self.instance.id
 
 
 AssignTeachFormset = inlineformset_factory(
-    Teach, MapSeniorTeach, form=AssignTeachForm, extra=2
+    Teach,
+    MapSeniorTeach,
+    form=AssignTeachForm,
+    formset=BaseAssignTeachFormset,
+    extra=2,
 )
 
 
 AssignNightFormset = inlineformset_factory(
-    TrainingNight, MapSeniorNight, form=AssignNightForm, extra=2
+    TrainingNight,
+    MapSeniorNight,
+    form=AssignNightForm,
+    formset=BaseAssignNightFormset,
+    extra=2,
 )
 
 
@@ -106,17 +324,16 @@ class BaseTeachForm(forms.Form):
     PERIOD_FIELD_TEST = re.compile("^p\d_choice$")
     location = forms.CharField(max_length=64)
 
-    def __init__(self, levels: list, night_id: int, *args, **kwargs):
+    def __init__(self, matrix: SlotMatrix, *args, **kwargs):
         super(BaseTeachForm, self).__init__(*args, **kwargs)
 
         level_choices = []
-        for i, level in enumerate(levels, 0):
+        for i, level in enumerate(matrix.levels, 0):
             level_choices.append((i, level.name))
 
-        self.night_id = night_id
-
-        instance = TrainingNight.nights.get(pk=night_id)
-        for number, period in enumerate(instance.get_periods(), 1):
+        self.night_id = matrix.night_id
+        self.periods = matrix.periods
+        for number, period in enumerate(self.periods, 1):
             self.fields[f"p{number}_choice"] = forms.MultipleChoiceField(
                 choices=level_choices,
                 widget=forms.CheckboxSelectMultiple,
@@ -141,18 +358,25 @@ class BaseTeachForm(forms.Form):
 
         return cleaned_data
 
+    # Every selected slot from one query. Checkboxes are numbered by period,
+    # then by level name within the period like Teach.get_by_period
     def get_teach_list(self):
         data = self.cleaned_data
-        night_id = self.night_id
-        instance: TrainingNight = TrainingNight.objects.get(id=night_id)
 
-        teach_list = []
-        periods = instance.get_periods()
+        slots = {}
+        teachs = (
+            Teach.objects.filter(period__in=self.periods)
+            .select_related("group")
+            .order_by("level__name")
+        )
+        for teach in teachs:
+            slots.setdefault(teach.period_id, []).append(teach)
 
-        for number, period in enumerate(periods, 1):
-            teachs = period.get_teach_instances()
+        teach_list = []
+        for number, period in enumerate(self.periods, 1):
+            period_teachs = slots.get(period.id, [])
             for index in data[f"p{number}_choice"]:
-                teach_list.append(teachs[int(index)])
+                teach_list.append(period_teachs[int(index)])
 
         return teach_list
 
@@ -160,18 +384,35 @@ class BaseTeachForm(forms.Form):
         return EmptyLesson.create()
 
     def save(self):
-        teach_list = self.get_teach_list()
-        content = self.get_content_instance()
-        location = self.cleaned_data["location"]
-        teach_id = Teach.get_next_teach_id()
+        # Content is only ever visible together with the group using it, so
+        # collect_content can't mistake it for unused
+        with transaction.atomic():
+            teach_list = self.get_teach_list()
+
+            # The plan follows the slot that becomes the parent of the new group
+            plan = ""
+            finished = False
+            if teach_list:
+                parent = min(teach_list, key=lambda teach: teach.id)
+                plan = parent.group.plan
+                finished = parent.group.finished
+
+            group = TeachGroup.create(
+                self.get_content_instance(),
+                self.cleaned_data["location"],
+                plan=plan,
+                finished=finished,
+            )
+            self.teach_id = group.id  # Used for future reference
 
-        self.teach_id = teach_id  # Used for future reference
+            old_ids = {teach.group_id for teach in teach_list}
+            Teach.objects.filter(id__in=[teach.id for teach in teach_list]).update(
+                group=group
+            )
+            TeachGroup.delete_unused(old_ids)
 
-        for teach in teach_list:
-            teach.change_content(content)
-            teach.location = location
-            teach.teach_id = teach_id
-            teach.save()
+        # update() skips the signals that invalidate cached schedules
+        caches.bump_night_versions([self.night_id])
 
     def content_fields(self):
         return [field for field in self if not self.PERIOD_FIELD_TEST.match(field.name)]
@@ -214,14 +455,18 @@ class LessonTeachForm(BaseTeachForm):
                     }
                 )
 
+        lesson = lesson_index.get(eocode) if eocode else None
+        # A known code is saved as stored, whatever case it was typed in
+        if lesson != None:
+            cleaned_data["eocode"] = lesson[0]
+
         if not title:
-            tmp_title = Lesson.get_title(eocode)
-            if tmp_title == False:
+            if lesson == None:
                 raise ValidationError(
                     {"title": "Lesson title not found, please enter manually."}
                 )
             else:
-                cleaned_data["title"] = tmp_title
+                cleaned_data["title"] = lesson[1]
 
         return cleaned_data
 
@@ -254,10 +499,10 @@ class TeachPlanForm(ModelForm):
     def __init__(self, teach_id: int, *args, **kwargs):
         super(TeachPlanForm, self).__init__(*args, **kwargs)
 
-        self.instance = Teach.get_by_teach_id(teach_id)
+        self.instance = TeachGroup.objects.get(id=teach_id)
 
     class Meta:
-        model = Teach
+        model = TeachGroup
         fields = ["plan"]
 
     def clean(self):
@@ -304,3 +549,86 @@ class DiscludeSeniorForm(forms.Form):
         cleaned_data = self.cleaned_data
         senior = cleaned_data.get("senior")
         senior.change_disclude_status(True)
+
+
+# Parses comma separated YYYY-MM-DD dates
+def parse_date_list(value: str):
+    try:
+        return [date.fromisoformat(day.strip()) for day in value.split(",")]
+    except ValueError:
+        raise ValidationError("Please enter dates in the format YYYY-MM-DD.")
+
+
+class TrainingTermForm(forms.Form):
+    WEEKDAY_CHOICES = list(enumerate(calendar.day_name))
+    DEFAULT_PERIOD_TYPES = [0, 0, 0]
+
+    start = forms.DateField()
+    end = forms.DateField()
+    weekday = forms.TypedChoiceField(choices=WEEKDAY_CHOICES, coerce=int)
+    skip = forms.CharField(required=False)  # Comma separated YYYY-MM-DD dates
+    period_types = forms.CharField(required=False)  # e.g. "0,0,1", 1 is an activity
+
+    def clean_skip(self):
+        skip = self.cleaned_data.get("skip")
+        if not skip:
+            return []
+        return parse_date_list(skip)
+
+    def clean_period_types(self):
+        period_types = self.cleaned_data.get("period_types")
+        if not period_types:
+            return self.DEFAULT_PERIOD_TYPES
+        period_types = [period_type.strip() for period_type in period_types.split(",")]
+        if not set(period_types) <= {"0", "1"}:
+            raise ValidationError(
+                "Please enter 0 (lesson) or 1 (activity) for each period."
+            )
+        return [int(period_type) for period_type in period_types]
+
+    def clean(self):
+        cleaned_data = self.cleaned_data
+        start = cleaned_data.get("start")
+        end = cleaned_data.get("end")
+
+        if start and end and end < start:
+            raise ValidationError({"end": "The term must end after it starts."})
+
+        return cleaned_data
+
+    def get_dates(self):
+        data = self.cleaned_data
+        return get_recurring_dates(
+            data["start"], data["end"], data["weekday"], data["skip"]
+        )
+
+    def save(self):
+        return TrainingNight.create_many(
+            self.get_dates(), self.cleaned_data["period_types"]
+        )
+
+
+class NightCopyForm(forms.Form):
+    dates = forms.CharField()  # Comma separated YYYY-MM-DD dates
+    assignments = forms.BooleanField(required=False)
+
+    def clean_dates(self):
+        return parse_date_list(self.cleaned_data.get("dates"))
+
+    def save(self, copier):
+        data = self.cleaned_data
+        return copier.create(data["dates"], data["assignments"])
+
+
+class NightTemplateForm(forms.Form):
+    name = forms.CharField(max_length=128)
+
+    def clean_name(self):
+        name = self.cleaned_data["name"]
+        if NightTemplate.objects.filter(name=name).exists():
+            raise ValidationError("A template with this name already exists.")
+        return name
+
+    def save(self, night: TrainingNight):
+        structure = NightCopier.get_structure(night)
+        return NightTemplate.create(self.cleaned_data["name"], structure)
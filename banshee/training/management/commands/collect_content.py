@@ -0,0 +1,75 @@
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from training.models import TeachGroup
+
+
+class Command(BaseCommand):
+    help = """
+        Deletes EmptyLesson, Activity and GenericLesson rows that no teach
+        group uses any more. Rows are checked in batches by id so each
+        DELETE is short and can run next to live traffic.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Rows checked per batch"
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to wait between batches",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the unused rows",
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs.get("batch_size")
+        dry_run = kwargs.get("dry_run")
+
+        total = 0
+        for content_class in TeachGroup.DISPOSABLE_CONTENT_CLASSES:
+            name = content_class.__name__
+            content_type = ContentType.objects.get_for_model(content_class)
+
+            checked = 0
+            deleted = 0
+            last_id = 0
+            while True:
+                ids = list(
+                    content_class.objects.filter(id__gt=last_id)
+                    .order_by("id")
+                    .values_list("id", flat=True)[:batch_size]
+                )
+                if not ids:
+                    break
+                last_id = ids[-1]
+                checked += len(ids)
+
+                # Content belongs to a single group, so once unused it is
+                # never picked up again
+                unused = content_class.objects.filter(id__in=ids).exclude(
+                    id__in=TeachGroup.objects.filter(
+                        content_type=content_type, object_id__in=ids
+                    ).values("object_id")
+                )
+                if dry_run:
+                    deleted += unused.count()
+                else:
+                    deleted += unused.delete()[0]
+
+                self.stdout.write(f"{name}: checked {checked}, unused {deleted}")
+                if kwargs.get("sleep"):
+                    time.sleep(kwargs.get("sleep"))
+
+            total += deleted
+
+        if dry_run:
+            self.stdout.write(f"{total} unused content rows found")
+        else:
+            self.stdout.write(f"{total} unused content rows deleted")
@@ -0,0 +1,49 @@
+import calendar
+
+from django.core.management.base import BaseCommand, CommandError
+from training.forms import TrainingTermForm
+
+
+class Command(BaseCommand):
+    WEEKDAYS = [day.lower() for day in calendar.day_name]
+
+    help = """
+        Creates a training night on one weekday of every week between two
+        dates, skipping nights that already exist. Period types are 0 for a
+        lesson and 1 for an activity, e.g. --periods 0,0,1,0
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("start", type=str, help="First date in YYYY-MM-DD")
+        parser.add_argument("end", type=str, help="Last date in YYYY-MM-DD")
+        parser.add_argument(
+            "weekday", type=str.lower, choices=self.WEEKDAYS, help="e.g. thursday"
+        )
+        parser.add_argument(
+            "--skip", type=str, default="", help="Comma separated dates to skip"
+        )
+        parser.add_argument(
+            "--periods", type=str, default="", help="Period types, defaults to 0,0,0"
+        )
+
+    def handle(self, *args, **kwargs):
+        form = TrainingTermForm(
+            {
+                "start": kwargs.get("start"),
+                "end": kwargs.get("end"),
+                "weekday": self.WEEKDAYS.index(kwargs.get("weekday")),
+                "skip": kwargs.get("skip"),
+                "period_types": kwargs.get("periods"),
+            }
+        )
+        if not form.is_valid():
+            errors = [
+                f"{field}: {' '.join(messages)}"
+                for field, messages in form.errors.items()
+            ]
+            raise CommandError("\n".join(errors))
+
+        nights = form.save()
+        for night in nights:
+            self.stdout.write(f"Created {night.date}")
+        self.stdout.write(f"{len(nights)} training nights created")
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from training.curriculum import CurriculumImporter
+
+
+class Command(BaseCommand):
+    help = """
+        Imports EO codes from a CSV file or a JSON lines file (.jsonl) into
+        Lessons and PerformanceObjectives. Each row needs eocode and title,
+        po and po_title are optional. Existing lessons are updated in place.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=str, help="Path to the curriculum file")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="File format, guessed from the extension by default",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000, help="Rows written per batch"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the changes without saving them",
+        )
+
+    def handle(self, *args, **kwargs):
+        path = kwargs.get("path")
+        file_format = kwargs.get("format")
+        if file_format == None:
+            file_format = "jsonl" if path.endswith((".jsonl", ".json")) else "csv"
+
+        importer = CurriculumImporter(kwargs.get("chunk_size"), kwargs.get("dry_run"))
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as file:
+                if file_format == "csv":
+                    rows = importer.read_csv(file)
+                else:
+                    rows = importer.read_jsonl(file)
+
+                for counts in importer.import_rows(rows):
+                    self.stdout.write(self.format_counts(counts))
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+
+        if kwargs.get("dry_run"):
+            self.stdout.write("Dry run, nothing was saved")
+        self.stdout.write(self.format_counts(importer.counts))
+
+    def format_counts(self, counts: dict):
+        return ", ".join(f"{count} {name}" for name, count in counts.items())
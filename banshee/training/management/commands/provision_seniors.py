@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from training.models import Senior
+from training.roster import RosterProvisioner
+
+
+class Command(BaseCommand):
+    help = f"""
+        Creates accounts and seniors from a CSV roster with the columns
+        username, password, level and optionally permission. Level is a
+        level number or name, permission defaults to Standard Instructor.
+        Standard Instructor: {Senior.STANDARD_INSTRUCTOR}
+        Training Manager: {Senior.TRAINING_MANAGER}
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=str, help="Path to the roster file")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Processes hashing passwords, defaults to the number of CPUs",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Check the roster without creating anyone",
+        )
+
+    def handle(self, *args, **kwargs):
+        provisioner = RosterProvisioner(kwargs.get("workers"), kwargs.get("dry_run"))
+        try:
+            with open(kwargs.get("path"), newline="", encoding="utf-8-sig") as file:
+                usernames = provisioner.provision(provisioner.read_csv(file))
+        except OSError as error:
+            raise CommandError(error)
+
+        if provisioner.errors:
+            errors = [f"Line {line}: {message}" for line, message in provisioner.errors]
+            raise CommandError("Nothing was created\n" + "\n".join(errors))
+
+        for username in provisioner.skipped:
+            self.stdout.write(f"Skipped {username}, the account already exists")
+        if kwargs.get("dry_run"):
+            self.stdout.write(f"Dry run, {len(usernames)} seniors would be created")
+        else:
+            self.stdout.write(f"{len(usernames)} seniors created")
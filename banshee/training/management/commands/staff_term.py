@@ -0,0 +1,55 @@
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from training.staffing import StaffingPlan
+
+
+class Command(BaseCommand):
+    help = """
+        Fills the open IC/Mod/ADI and Duty NCO/Floater roles of every training
+        night between two dates, balancing the number of nights per senior.
+        Prints a preview unless --commit is given.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "start", type=date.fromisoformat, help="First date in YYYY-MM-DD"
+        )
+        parser.add_argument(
+            "end", type=date.fromisoformat, help="Last date in YYYY-MM-DD"
+        )
+        parser.add_argument(
+            "--teach-roles",
+            type=lambda roles: roles.split(","),
+            help="Comma separated teach roles to fill, defaults to IC,Mod,ADI",
+        )
+        parser.add_argument(
+            "--commit",
+            action="store_true",
+            help="Save the assignments instead of only previewing them",
+        )
+
+    def handle(self, *args, **kwargs):
+        plan_kwargs = {}
+        if kwargs.get("teach_roles"):
+            plan_kwargs["teach_roles"] = kwargs.get("teach_roles")
+        plan = StaffingPlan(kwargs.get("start"), kwargs.get("end"), **plan_kwargs)
+
+        for night, rows, unfilled in plan.get_preview():
+            self.stdout.write(f"{night.date}")
+            for label, senior in rows:
+                self.stdout.write(f"    {label}: {senior}")
+            for label in unfilled:
+                self.stdout.write(f"    {label}: UNFILLED")
+
+        self.stdout.write(
+            f"{len(plan.assignments)} assignments planned, {len(plan.unfilled)} unfilled"
+        )
+
+        if kwargs.get("commit"):
+            try:
+                count = plan.commit()
+            except ValidationError as error:
+                raise CommandError(error.messages[0])
+            self.stdout.write(f"{count} assignments saved")
@@ -25,6 +25,24 @@ class SeniorManager(models.Manager):
     def get_assignable_seniors(self):
         return self.get_queryset().filter(discluded_assignment=False)
 
+    # Assignable seniors without a role or a teach anywhere in the night
+    def get_assignable_for_night(self, night):
+        return (
+            self.get_assignable_seniors()
+            .exclude(mapseniornight__night=night)
+            .exclude(mapseniorteach__teach__period__night=night)
+            .select_related("user")
+        )
+
+    # Assignable seniors without a night role or a teach in the same period
+    def get_assignable_for_period(self, period):
+        return (
+            self.get_assignable_seniors()
+            .exclude(mapseniornight__night_id=period.night_id)
+            .exclude(mapseniorteach__teach__period=period)
+            .select_related("user")
+        )
+
 
 class InstructorManager(models.Manager):
     def get_queryset(self):
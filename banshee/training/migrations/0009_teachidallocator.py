@@ -0,0 +1,37 @@
+# Generated by Django 4.0.5 on 2026-10-18 11:16
+
+from django.db import migrations, models
+
+
+def seed_allocator(apps, schema_editor):
+    Teach = apps.get_model("training", "Teach")
+    TeachIdAllocator = apps.get_model("training", "TeachIdAllocator")
+
+    largest = Teach.objects.aggregate(largest=models.Max("teach_id"))["largest"]
+    TeachIdAllocator.objects.create(pk=1, next_id=(largest or 0) + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("training", "0008_alter_senior_options_remove_senior_rank"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TeachIdAllocator",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("next_id", models.PositiveIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(seed_allocator, migrations.RunPython.noop),
+    ]
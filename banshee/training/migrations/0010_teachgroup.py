@@ -0,0 +1,121 @@
+# Generated by Django 4.0.5 on 2026-10-18 11:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Every teach_id becomes a group with the same id, taking its shared fields
+# from the first (parent) instance like the old Teach methods did
+def create_groups(apps, schema_editor):
+    Teach = apps.get_model("training", "Teach")
+    TeachGroup = apps.get_model("training", "TeachGroup")
+
+    groups = {}
+    instances = Teach.objects.order_by("id").values_list(
+        "teach_id", "content_type_id", "object_id", "location", "finished", "plan"
+    )
+    for teach_id, content_type_id, object_id, location, finished, plan in instances:
+        if teach_id not in groups:
+            groups[teach_id] = TeachGroup(
+                id=teach_id,
+                content_type_id=content_type_id,
+                object_id=object_id,
+                location=location,
+                finished=finished,
+                plan=plan,
+            )
+    TeachGroup.objects.bulk_create(groups.values(), batch_size=500)
+    Teach.objects.update(group_id=models.F("teach_id"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("training", "0009_teachidallocator"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TeachGroup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField()),
+                ("location", models.CharField(max_length=128)),
+                ("finished", models.BooleanField(default=False)),
+                ("plan", models.CharField(blank=True, default="", max_length=1000)),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="teachgroup",
+            index=models.Index(
+                fields=["content_type", "object_id"],
+                name="training_te_content_b99cb2_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="teach",
+            name="group",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                to="training.teachgroup",
+            ),
+        ),
+        migrations.RunPython(create_groups),
+        migrations.AlterField(
+            model_name="teach",
+            name="group",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                to="training.teachgroup",
+            ),
+        ),
+        migrations.AlterModelOptions(
+            name="teach",
+            options={"ordering": ["group", "id"]},
+        ),
+        migrations.RemoveIndex(
+            model_name="teach",
+            name="training_te_content_626850_idx",
+        ),
+        migrations.RemoveField(
+            model_name="teach",
+            name="content_type",
+        ),
+        migrations.RemoveField(
+            model_name="teach",
+            name="finished",
+        ),
+        migrations.RemoveField(
+            model_name="teach",
+            name="location",
+        ),
+        migrations.RemoveField(
+            model_name="teach",
+            name="object_id",
+        ),
+        migrations.RemoveField(
+            model_name="teach",
+            name="plan",
+        ),
+        migrations.RemoveField(
+            model_name="teach",
+            name="teach_id",
+        ),
+    ]
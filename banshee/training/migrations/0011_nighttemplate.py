@@ -0,0 +1,29 @@
+# Generated by Django 4.0.5 on 2026-10-18 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("training", "0010_teachgroup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NightTemplate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=128, unique=True)),
+                ("structure", models.JSONField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+# Bulk created nights shared one placeholder per batch and copied nights
+# shared their activities. Every group after the first using a content row
+# gets its own copy, and the teach id counter moves past every placeholder
+# id since placeholders now take their ids from it
+def unshare_content(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    TeachGroup = apps.get_model("training", "TeachGroup")
+    TeachIdAllocator = apps.get_model("training", "TeachIdAllocator")
+
+    largest = max(
+        TeachGroup.objects.aggregate(largest=models.Max("id"))["largest"] or 0,
+        apps.get_model("training", "EmptyLesson").objects.aggregate(
+            largest=models.Max("id")
+        )["largest"]
+        or 0,
+    )
+    allocator, created = TeachIdAllocator.objects.get_or_create(
+        pk=1, defaults={"next_id": largest + 1}
+    )
+    allocator.next_id = max(allocator.next_id, largest + 1)
+
+    for model_name in ["EmptyLesson", "Activity", "GenericLesson"]:
+        content_class = apps.get_model("training", model_name)
+        content_type = ContentType.objects.filter(
+            app_label="training", model=model_name.lower()
+        ).first()
+        if content_type == None:
+            continue
+
+        seen = set()
+        groups = TeachGroup.objects.filter(content_type=content_type).order_by("id")
+        for group in groups:
+            if group.object_id not in seen:
+                seen.add(group.object_id)
+                continue
+            content = content_class.objects.get(id=group.object_id)
+            content.id = None
+            if model_name == "EmptyLesson":
+                content.id = allocator.next_id
+                allocator.next_id += 1
+            content.save(force_insert=True)
+            group.object_id = content.id
+            group.save(update_fields=["object_id"])
+
+    allocator.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("training", "0011_nighttemplate"),
+    ]
+
+    operations = [
+        migrations.RunPython(unshare_content, migrations.RunPython.noop),
+    ]
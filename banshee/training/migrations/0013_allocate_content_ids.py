@@ -0,0 +1,34 @@
+# Generated by Django 4.0.5 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+# Activities and generic lessons now take their ids from the teach id
+# counter too, so it moves past every id they already use
+def advance_allocator(apps, schema_editor):
+    TeachIdAllocator = apps.get_model("training", "TeachIdAllocator")
+
+    largest = max(
+        apps.get_model("training", model_name).objects.aggregate(
+            largest=models.Max("id")
+        )["largest"]
+        or 0
+        for model_name in ["TeachGroup", "EmptyLesson", "Activity", "GenericLesson"]
+    )
+    allocator, created = TeachIdAllocator.objects.get_or_create(
+        pk=1, defaults={"next_id": largest + 1}
+    )
+    if allocator.next_id <= largest:
+        allocator.next_id = largest + 1
+        allocator.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("training", "0012_unshare_content"),
+    ]
+
+    operations = [
+        migrations.RunPython(advance_allocator, migrations.RunPython.noop),
+    ]
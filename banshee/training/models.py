@@ -1,6 +1,7 @@
 from datetime import datetime, date, timedelta
-from django.db import models
-from django.db.models import Q
+from types import MappingProxyType
+from django.db import models, transaction
+from django.db.models import F
 from django.urls import reverse
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
@@ -10,6 +11,8 @@ from django.core.exceptions import ObjectDoesNotExist
 from training.managers import managers
 
 from .managers import level_managers, senior_managers
+from . import caches
+from .deletion import delete_rows
 
 from users.models import TrainingSetting
 
@@ -29,12 +32,26 @@ class Level(models.Model):
     seniors = level_managers.SeniorManager()
     juniors = level_managers.JuniorManager()
 
+    # Registry for this process, see get_registry
+    cached_registry = None
+    cached_version = None
+
     class Meta:
         ordering = ["name"]
 
     def __str__(self):
         return self.name
 
+    # The level table barely changes, so every process keeps a copy and
+    # reloads it when a Level save or delete bumps the shared version
+    @classmethod
+    def get_registry(cls):
+        version = caches.get_level_version()
+        if cls.cached_registry == None or cls.cached_version != version:
+            cls.cached_registry = LevelRegistry(cls.objects.all())
+            cls.cached_version = version
+        return cls.cached_registry
+
     # Not put into a manager as it's only 1 function
     @classmethod
     def get_officer(cls):
@@ -46,6 +63,41 @@ class Level(models.Model):
             )
 
 
+class LevelRegistry:
+    """
+    Read-only snapshot of every Level, split the same way as the juniors,
+    seniors and officer managers. Partitions are tuples in the model's
+    ordering and lookups raise Level.DoesNotExist like the managers' get.
+    Instances are shared between requests and must not be modified.
+    """
+
+    def __init__(self, levels):
+        self.all = tuple(levels)
+        self.juniors = tuple(level for level in self.all if 1 <= level.number <= 4)
+        self.seniors = tuple(level for level in self.all if 5 <= level.number <= 6)
+        self.officers = tuple(
+            level for level in self.all if level.number == Level.OFFICER_LEVEL_NUMBER
+        )
+        self.ids = frozenset(level.id for level in self.all)
+        self.by_number = MappingProxyType({level.number: level for level in self.all})
+        self.by_name = MappingProxyType({level.name: level for level in self.all})
+
+    def get_by_number(self, number: int):
+        try:
+            return self.by_number[int(number)]
+        except (KeyError, ValueError):
+            raise Level.DoesNotExist(f"No level with number {number}")
+
+    def get_by_name(self, name: str):
+        try:
+            return self.by_name[name]
+        except KeyError:
+            raise Level.DoesNotExist(f"No level named {name}")
+
+    def get_senior_choices(self):
+        return [(level.number, level.name) for level in self.seniors]
+
+
 class Senior(models.Model):
     STANDARD_INSTRUCTOR = 1
     TRAINING_MANAGER = 2
@@ -113,14 +165,112 @@ class TrainingNight(models.Model):
         instance.date = date
         instance.save()
 
+        # Reserve every teach_id the night needs in one go
+        levels = list(Level.get_registry().juniors)
+        needed = period_types.count(0) * len(levels) + period_types.count(1)
+        teach_ids = Teach.get_next_teach_ids(needed)
+
         for order, period_type in enumerate(period_types, 1):
             if period_type == 0:
-                TrainingPeriod.create_fulllesson(instance, order)
+                period_ids = teach_ids[: len(levels)]
+                teach_ids = teach_ids[len(levels) :]
+                TrainingPeriod.create_fulllesson(instance, order, period_ids)
             if period_type == 1:
-                TrainingPeriod.create_fullact(instance, order)
+                TrainingPeriod.create_fullact(instance, order, teach_ids.pop(0))
 
         return instance
 
+    # Creates every missing night on the given dates in one transaction with a
+    # fixed number of bulk inserts. Each group's placeholder takes the group's
+    # id, since MySQL can't return the ids of bulk inserted rows
+    @classmethod
+    def create_many(cls, dates: list, period_types: list = [0, 0, 0]):
+        if not set(period_types) <= {0, 1}:
+            raise ValueError("Period types must be 0 (lesson) or 1 (activity)")
+
+        with transaction.atomic():
+            existing = cls.objects.filter(date__in=dates).values_list("date", flat=True)
+            dates = sorted(set(dates) - set(existing))
+            if not dates:
+                return []
+
+            cls.objects.bulk_create([cls(date=day) for day in dates])
+            nights = list(cls.objects.filter(date__in=dates).order_by("date"))
+
+            TrainingPeriod.objects.bulk_create(
+                [
+                    TrainingPeriod(night=night, order=order)
+                    for night in nights
+                    for order in range(1, len(period_types) + 1)
+                ]
+            )
+            periods = TrainingPeriod.objects.filter(night__in=nights).order_by(
+                "night__date", "order"
+            )
+
+            levels = list(Level.get_registry().juniors)
+            needed = period_types.count(0) * len(levels) + period_types.count(1)
+            placeholders = [
+                EmptyLesson(id=teach_id)
+                for teach_id in Teach.get_next_teach_ids(needed * len(nights))
+            ]
+            groups = [
+                TeachGroup(id=placeholder.id, content=placeholder)
+                for placeholder in placeholders
+            ]
+
+            unused_groups = iter(groups)
+            teachs = []
+            for period in periods:
+                period_type = period_types[period.order - 1]
+                if period_type == 1:
+                    group = next(unused_groups)
+                for level in levels:
+                    if period_type == 0:
+                        group = next(unused_groups)
+                    teachs.append(Teach(group=group, level=level, period=period))
+
+            EmptyLesson.objects.bulk_create(placeholders, batch_size=500)
+            TeachGroup.objects.bulk_create(groups, batch_size=500)
+            Teach.objects.bulk_create(teachs, batch_size=500)
+
+        # bulk_create skips the signals that invalidate cached calendars
+        for year, month in {(night.date.year, night.date.month) for night in nights}:
+            caches.bump_month_version(year, month)
+        return nights
+
+    # Deletes the nights from start to end (or just start) and everything
+    # hanging off them with one DELETE per table, leaves first so nothing
+    # cascades and no per row signal runs
+    @classmethod
+    def delete_range(cls, start: date, end: date = None):
+        if end == None:
+            end = start
+
+        with transaction.atomic():
+            nights = cls.objects.filter(date__range=(start, end))
+            deleted = list(nights.values_list("id", "date"))
+            if not deleted:
+                return 0
+
+            night_ids = [night_id for night_id, day in deleted]
+            periods = TrainingPeriod.objects.filter(night_id__in=night_ids)
+            TrainingPeriod.delete_teachs(periods)
+
+            delete_rows(MapSeniorNight.objects.filter(night_id__in=night_ids))
+            excused = cls.excused.through
+            delete_rows(excused.objects.filter(trainingnight_id__in=night_ids))
+            delete_rows(periods, [Teach])
+            delete_rows(
+                cls.objects.filter(id__in=night_ids),
+                [TrainingPeriod, MapSeniorNight, excused],
+            )
+
+        caches.bump_night_versions(night_ids)
+        for year, month in {(day.year, day.month) for night_id, day in deleted}:
+            caches.bump_month_version(year, month)
+        return len(deleted)
+
     # Managers
     objects = models.Manager()
     nights = managers.NightManager()
@@ -132,21 +282,7 @@ class TrainingNight(models.Model):
         return self.trainingperiod_set.all().order_by("order")
 
     def get_unassigned(self):
-        queryset = Senior.seniors.get_assignable_seniors()
-        night_assignment_ids = [senior.id for (role, senior) in self.get_assignments()]
-
-        teach_assignment_ids = []
-        for period in self.get_periods():
-            for teach in period.get_teach_instances():
-                teaching_seniors = [
-                    senior.id for (role, senior) in teach.get_assignments()
-                ]
-                teach_assignment_ids.extend(teaching_seniors)
-
-        filtered = queryset.exclude(
-            Q(id__in=night_assignment_ids) | Q(id__in=teach_assignment_ids)
-        )
-        return filtered
+        return Senior.seniors.get_assignable_for_night(self)
 
     # Convenience Functions
     def get_assignments(self):
@@ -164,25 +300,89 @@ class TrainingPeriod(models.Model):
         queryset = Teach.get_by_period(self)
         return queryset
 
+    # Deletes the teaches of a queryset of periods with their assignments,
+    # groups and the groups' content, one DELETE per table. delete_rows
+    # skips signals so callers bump the cache versions themselves
+    @classmethod
+    def delete_teachs(cls, periods):
+        teachs = Teach.objects.filter(period__in=periods)
+        group_ids = list(teachs.values_list("group_id", flat=True).distinct())
+
+        delete_rows(MapSeniorTeach.objects.filter(teach__period__in=periods))
+        delete_rows(teachs, [MapSeniorTeach])
+
+        # Groups never leave their night, but a lone period may share one
+        TeachGroup.delete_unused(group_ids)
+
     # create a training period with a teach instance for each level
     @classmethod
-    def create_fulllesson(cls, night, order):
+    def create_fulllesson(cls, night, order, teach_ids: list = None):
         instance = cls.objects.create(night=night, order=order)
-        levels = Level.juniors.all()
-        for level in levels:
-            Teach.create(level, instance)
+        levels = Level.get_registry().juniors
+        if teach_ids == None:
+            teach_ids = Teach.get_next_teach_ids(len(levels))
+        for level, teach_id in zip(levels, teach_ids):
+            Teach.create(level, instance, TeachGroup.create(id=teach_id))
         return instance
 
     @classmethod
-    def create_fullact(cls, night, order):
+    def create_fullact(cls, night, order, teach_id: int = None):
         instance = cls.objects.create(night=night, order=order)
-        levels = Level.juniors.all()
-        teach_id = Teach.get_next_teach_id()
+        levels = Level.get_registry().juniors
+        group = TeachGroup.create(id=teach_id)
         for level in levels:
-            Teach.create(level, instance, id=teach_id)
+            Teach.create(level, instance, group)
         return instance
 
 
+# Hands out teach_ids, a single row holding the next unused id
+class TeachIdAllocator(models.Model):
+    next_id = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return str(self.next_id)
+
+    def save(self, *args, **kwargs):
+        self.pk = 1
+        super(TeachIdAllocator, self).save(*args, **kwargs)
+
+    @classmethod
+    def create(cls):
+        # Disposable content takes its ids from here too
+        largest = max(
+            model.objects.aggregate(largest=models.Max("id"))["largest"] or 0
+            for model in [TeachGroup] + TeachGroup.DISPOSABLE_CONTENT_CLASSES
+        )
+        obj, created = cls.objects.get_or_create(
+            pk=1, defaults={"next_id": largest + 1}
+        )
+        return obj
+
+    # Reserves count consecutive ids. The UPDATE locks the row (or the whole
+    # database on SQLite) until the transaction ends, so parallel requests
+    # always read back their own increment and never share ids
+    @classmethod
+    def allocate(cls, count: int = 1):
+        with transaction.atomic():
+            if not cls.objects.filter(pk=1).update(next_id=F("next_id") + count):
+                cls.create()
+                cls.objects.filter(pk=1).update(next_id=F("next_id") + count)
+            next_id = cls.objects.values_list("next_id", flat=True).get(pk=1)
+        return list(range(next_id - count, next_id))
+
+
+# Content made for a single group takes its ids from TeachIdAllocator rather
+# than the auto increment, so bulk created rows can be given theirs up front
+class AllocatedIdModel(models.Model):
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self.id == None:
+            self.id = TeachIdAllocator.allocate()[0]
+        super(AllocatedIdModel, self).save(*args, **kwargs)
+
+
 # Managing Lessons
 class PerformanceObjective(models.Model):
     po = models.CharField(max_length=3, unique=True)
@@ -255,7 +455,7 @@ class Lesson(models.Model):
         return [("EO Code", self.eocode), ("Title", self.title)]
 
 
-class Activity(models.Model):
+class Activity(AllocatedIdModel):
     title = models.CharField(max_length=256, default="Squadron-Organized Event")
 
     def __str__(self):
@@ -287,7 +487,7 @@ class Activity(models.Model):
         return [("Title", self.title)]
 
 
-class GenericLesson(models.Model):
+class GenericLesson(AllocatedIdModel):
     topic = models.CharField(max_length=255)
     title = models.CharField(max_length=255)
 
@@ -320,65 +520,136 @@ class GenericLesson(models.Model):
         return [("Topic", self.topic), ("Title", self.title)]
 
 
-# Blank object for empty teach instances
-class EmptyLesson(models.Model):
+# Blank object for empty teach instances, one per group
+class EmptyLesson(AllocatedIdModel):
     def __str__(self):
         return "Empty Lesson Placeholder"
 
     @classmethod
-    def create(cls):
-        return cls.objects.create()
+    def create(cls, id: int = None):
+        return cls.objects.create(id=id)
+
+    def get_form_initial(self):
+        return {}
 
     @classmethod
     def format_html_block(self, *args, **kwargs):
         return "<div class='text-center h-full font-bold text-lg tracking-tight'>UNASSIGNED</div>"
 
 
-class Teach(models.Model):
-    DEFAULT_LOCATION = "Classroom"
-    DEFAULT_CONTENT_CLASS = EmptyLesson
-    CONTENT_CLASSES_LIST = [
-        (0, Lesson),
-        (1, Activity),
-        (2, GenericLesson),
-    ]
-    CONTENT_CLASSES = [x[1] for x in CONTENT_CLASSES_LIST]
-
-    teach_id = (
-        models.PositiveIntegerField()
-    )  # For joining 2 period lessons or mulilevel lessons
+# What the slots of a multi-period or multi-level lesson share, its id is the
+# teach_id used in urls and is handed out by TeachIdAllocator
+class TeachGroup(models.Model):
+    # Content made for and used by a single group, unlike Lessons which are
+    # reused by eocode
+    DISPOSABLE_CONTENT_CLASSES = [EmptyLesson, Activity, GenericLesson]
 
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
     content = GenericForeignKey("content_type", "object_id")
 
-    level = models.ForeignKey(Level, on_delete=models.SET_NULL, null=True)
     location = models.CharField(max_length=128)
     finished = models.BooleanField(default=False)
     plan = models.CharField(
         max_length=1000, default="", blank=True
     )  # Link to lesson plan
 
+    def __str__(self):
+        return str(self.id) + " " + str(self.content)
+
+    class Meta:
+        indexes = [models.Index(fields=["content_type", "object_id"])]
+
+    @classmethod
+    def create(
+        cls,
+        content=None,
+        location: str = "",
+        id: int = None,
+        plan: str = "",
+        finished: bool = False,
+    ):
+        if id == None:
+            id = TeachIdAllocator.allocate()[0]
+
+        # A placeholder must never be visible without its group
+        with transaction.atomic():
+            if content == None:
+                content = EmptyLesson.create(id)
+            instance = cls.objects.create(
+                id=id, content=content, location=location, plan=plan, finished=finished
+            )
+        return instance
+
+    # Drops the groups among ids that no slot uses any more, with their
+    # disposable content, one DELETE per table. A group without slots isn't
+    # on any schedule, so there is nothing to invalidate
+    @classmethod
+    def delete_unused(cls, ids):
+        ids = list(ids)
+        unused = cls.objects.filter(id__in=ids).exclude(
+            id__in=Teach.objects.filter(group_id__in=ids).values("group_id")
+        )
+        object_ids = {}
+        for content_type_id, object_id in unused.values_list(
+            "content_type_id", "object_id"
+        ):
+            object_ids.setdefault(content_type_id, []).append(object_id)
+        delete_rows(unused, [Teach])
+
+        # Disposable content belongs to exactly one group
+        for content_class in cls.DISPOSABLE_CONTENT_CLASSES:
+            content_type = ContentType.objects.get_for_model(content_class)
+            ids = object_ids.get(content_type.id, [])
+            if ids:
+                delete_rows(content_class.objects.filter(id__in=ids))
+
+    def update_plan(self, plan: str):
+        self.plan = plan
+        if plan == "":
+            self.finished = False
+        else:
+            self.finished = True
+        return self.save()
+
+    def change_content(self, content):
+        old_content = self.content
+
+        self.content = content
+        self.save()
+
+        if type(old_content) == EmptyLesson:
+            old_content.delete()
+
+
+class Teach(models.Model):
+    DEFAULT_LOCATION = "Classroom"
+    DEFAULT_CONTENT_CLASS = EmptyLesson
+    CONTENT_CLASSES_LIST = [
+        (0, Lesson),
+        (1, Activity),
+        (2, GenericLesson),
+    ]
+    CONTENT_CLASSES = [x[1] for x in CONTENT_CLASSES_LIST]
+
+    # For joining 2 period lessons or mulilevel lessons
+    group = models.ForeignKey(TeachGroup, on_delete=models.PROTECT)
+    level = models.ForeignKey(Level, on_delete=models.SET_NULL, null=True)
     period = models.ForeignKey(TrainingPeriod, on_delete=models.CASCADE)
 
     def __str__(self):
-        return str(self.teach_id) + " " + str(self.content)
+        return str(self.group)
 
     class Meta:
-        ordering = ["teach_id", "id"]
-        indexes = [models.Index(fields=["content_type", "object_id"])]
+        ordering = ["group", "id"]
 
-    # TODO: Move and create teachids and levels manager
     @classmethod
     def get_next_teach_id(cls):
-        largest = (
-            cls.objects.all().last()
-        )  # don't use class get_objects to prevent duplicate ids
-        if not largest:
-            return 1
+        return TeachIdAllocator.allocate()[0]
 
-        largest_id = largest.teach_id
-        return largest_id + 1
+    @classmethod
+    def get_next_teach_ids(cls, count: int):
+        return TeachIdAllocator.allocate(count)
 
     @classmethod
     def get_by_period(cls, period: TrainingPeriod):
@@ -386,133 +657,117 @@ class Teach(models.Model):
         return queryset.order_by("level__name")
 
     @classmethod
-    def create(cls, level: Level, period: TrainingPeriod, content=None, id: int = None):
-        if id == None:
-            id = cls.get_next_teach_id()
-
-        if content == None:
-            content = EmptyLesson.create()
+    def create(cls, level: Level, period: TrainingPeriod, group: TeachGroup = None):
+        if group == None:
+            group = TeachGroup.create()
 
-        instance = cls.objects.create(
-            teach_id=id, period=period, content=content, level=level
-        )
+        instance = cls.objects.create(group=group, period=period, level=level)
         return instance
 
     @classmethod
     def get_by_teach_id(cls, teach_id):
-        instances = cls.objects.filter(teach_id=teach_id)
-        if not instances.exists():
+        instance = (
+            cls.objects.filter(group_id=teach_id)
+            .select_related("group")
+            .order_by("id")
+            .first()
+        )
+        if instance == None:
             raise ObjectDoesNotExist("Teach ID not Found")
-        return instances.first()
+        return instance
 
     # Get Teach Attrs or Related Data
     def get_absolute_url(self):
-        return reverse("teach", args=[self.teach_id])
+        return reverse("teach", args=[self.group_id])
 
     def get_night_id(self):
-        return self.period.night.id
+        return self.period.night_id
 
     def get_date(self):
         return self.period.night.date
 
     def get_parent_instance(self):
-        return self.get_by_teach_id(self.teach_id)
+        # utils.NightGrid sets this when it loads a whole night at once
+        if hasattr(self, "_parent_instance"):
+            return self._parent_instance
+        return self.get_by_teach_id(self.group_id)
 
     @classmethod
     def get_neighbour_instances(cls, teach_id):
-        return cls.objects.filter(teach_id=teach_id)
-
-    def get_form_slot_initial(self):
-        instances = Teach.get_neighbour_instances(self.teach_id)
-        positions = instances.values_list("period__order", "level__name")
-        night_instance = self.period.night
-        levels = Level.juniors.all()
-
-        slot_initial = []
-
-        for num, period in enumerate(night_instance.get_periods(), 1):
-            initial = []
-            for level in levels:
-                if (num, level.name) in positions:
-                    initial.append("checked")
-                else:
-                    initial.append("")
-            slot_initial.append(initial)
-        return slot_initial
-
-    def can_edit_plan(self, senior: Senior):
+        return cls.objects.filter(group_id=teach_id)
+
+    def can_edit_plan(self, senior: Senior, instructors: list = None):
         if senior.is_training():
             return True
-        instructors = MapSeniorTeach.get_instructors(self)
+        if instructors == None:
+            instructors = MapSeniorTeach.get_instructors(self)
         allowed_list = [instructor[1] for instructor in instructors]
         if senior in allowed_list:
             return True
         return False
 
     def get_level_list(self):
-        queryset = self.get_neighbour_instances(self.teach_id)
+        queryset = self.get_neighbour_instances(self.group_id)
         instances = queryset.values_list("level", flat=True)
         unique_instances = list(set(instances))
         return unique_instances
 
     def get_period_list(self):
-        queryset = self.get_neighbour_instances(self.teach_id)
+        queryset = self.get_neighbour_instances(self.group_id)
         instances = queryset.values_list("period__order", flat=True)
         unique_instances = list(set(instances))
         return unique_instances
 
     def get_status(self):
-        self: Teach = self.get_parent_instance()
-        if self.finished == True:
+        offset = TrainingSetting.get_duedateoffset()
+        return self.resolve_status(self.group.finished, self.get_date(), offset)
+
+    @staticmethod
+    def resolve_status(finished: bool, teach_date: date, offset: int):
+        if finished == True:
             return "Submitted"
 
         today = date.today()
-        settings = TrainingSetting.create()
-        offset = settings.duedateoffset
-        teach_date = self.get_date()
-
         if teach_date < today + timedelta(days=offset):
             return "Missing"
         else:
             return "Not Submitted"
 
-    def get_assignable_seniors(self):
-        queryset = Senior.seniors.get_assignable_seniors()
-        night_assignment_ids = [
-            senior.id for role, senior in self.period.night.get_assignments()
-        ]
-
-        teach_assignment_ids = []
-        for teach in self.period.get_teach_instances():
-            teaching_seniors = [senior.id for (role, senior) in teach.get_assignments()]
-            teach_assignment_ids.extend(teaching_seniors)
-
-        filtered = queryset.exclude(
-            Q(id__in=night_assignment_ids) | Q(id__in=teach_assignment_ids)
+    # Statuses for many teach groups at once, keyed by teach_id
+    @classmethod
+    def get_statuses(cls, teach_ids):
+        offset = TrainingSetting.get_duedateoffset()
+        instances = (
+            cls.objects.filter(group_id__in=teach_ids)
+            .order_by("id")
+            .values_list("group_id", "group__finished", "period__night__date")
         )
-        return filtered
+
+        statuses = {}
+        for teach_id, finished, teach_date in instances:
+            # Every slot of a group is on the same night
+            if teach_id not in statuses:
+                statuses[teach_id] = cls.resolve_status(finished, teach_date, offset)
+        return statuses
+
+    @classmethod
+    def get_night_statuses(cls, night: TrainingNight):
+        teach_ids = cls.objects.filter(period__night=night).values("group_id")
+        return cls.get_statuses(teach_ids)
+
+    def get_assignable_seniors(self):
+        return Senior.seniors.get_assignable_for_period(self.period)
 
     # Updating Teach Attrs
     def update_plan(self, plan: str):
-        self.plan = plan
-        if plan == "":
-            self.finished = False
-        else:
-            self.finished = True
-        return self.save()
+        return self.group.update_plan(plan)
 
     def change_content(self, content):
-        old_content = self.content
-
-        self.content = content
-        self.save()
-
-        if type(old_content) == EmptyLesson:
-            old_content.delete()
+        return self.group.change_content(content)
 
     # managing content
     def get_content_type(self):
-        class_name = type(self.content)
+        class_name = type(self.group.content)
         return class_name
 
     def get_absolute_edit_url(self):
@@ -523,33 +778,34 @@ class Teach(models.Model):
         for content_tuple in self.CONTENT_CLASSES_LIST:
             if content_tuple[1] == content_class:
                 return reverse(
-                    "teach-form", args=[night_id, content_tuple[0], self.teach_id]
+                    "teach-form", args=[night_id, content_tuple[0], self.group_id]
                 )
-        return reverse("teach-form", args=[night_id, 0, self.teach_id])
+        return reverse("teach-form", args=[night_id, 0, self.group_id])
 
     def get_content_attributes(self):
-        self: Teach = self.get_parent_instance()
         content_class = self.get_content_type()
 
         if content_class in self.CONTENT_CLASSES:
-            return content_class.get_content_attributes(self.content)
+            return content_class.get_content_attributes(self.group.content)
         return {}
 
     def format_html_block(self):
-        self: Teach = self.get_parent_instance()
         content_class = self.get_content_type()
 
+        # Assignments hang off the parent instance
         if content_class in self.CONTENT_CLASSES + [self.DEFAULT_CONTENT_CLASS]:
-            return content_class.format_html_block(self.content, self, self.location)
+            return content_class.format_html_block(
+                self.group.content, self.get_parent_instance(), self.group.location
+            )
         return "UNKNOWN CONTENT CLASS NAME"
 
     def get_form_content_initial(self):
         initial = {}
-        initial["location"] = self.location
+        initial["location"] = self.group.location
         content_class = self.get_content_type()
 
         if content_class in self.CONTENT_CLASSES:
-            initial.update(self.content.get_form_initial())
+            initial.update(self.group.content.get_form_initial())
 
         return initial
 
@@ -567,7 +823,7 @@ class MapSeniorTeach(models.Model):
     role = models.CharField(max_length=32)
 
     def __str__(self):
-        return str(self.teach.teach_id) + " " + str(self.senior)
+        return str(self.teach.group_id) + " " + str(self.senior)
 
     # TODO: Create seniorteachs manager
     @classmethod
@@ -579,7 +835,8 @@ class MapSeniorTeach(models.Model):
 
     @classmethod
     def get_teach_queryset(cls, teach: Teach):
-        queryset = cls.objects.filter(teach=teach)
+        # Use the related manager so prefetched assignments are reused
+        queryset = teach.mapseniorteach_set.all()
         return queryset
 
     # TODO: change to get_assignments
@@ -604,13 +861,71 @@ class MapSeniorTeach(models.Model):
         return sorted(instructors, key=role_priority)
 
     @classmethod
-    def get_senior_queryset_after_date(cls, senior: Senior, date: date):
+    def get_senior_queryset_after_date(
+        cls, senior: Senior, date: date, detailed: bool = False
+    ):
         queryset = cls.objects.filter(
             senior=senior,
             teach__period__night__date__gte=date,  # teach > trainingperiod > trainingnight date is after date
         )
+        if detailed:
+            return cls.add_teach_details(queryset)
         return queryset
 
+    # Attaches date, status, level_list and period_list to every assignment
+    # using one query for all of their teach groups, returns a list
+    @classmethod
+    def add_teach_details(cls, queryset):
+        assignments = list(
+            queryset.select_related("teach__group")
+            .prefetch_related("teach__group__content")
+            .annotate(date=F("teach__period__night__date"))
+        )
+        teach_ids = {assignment.teach.group_id for assignment in assignments}
+        if not teach_ids:
+            return assignments
+
+        offset = TrainingSetting.get_duedateoffset()
+        instances = (
+            Teach.objects.filter(group_id__in=teach_ids)
+            .order_by("id")
+            .values_list(
+                "group_id",
+                "level",
+                "period__order",
+                "group__finished",
+                "period__night__date",
+            )
+        )
+
+        groups = {}
+        for teach_id, level, order, finished, teach_date in instances:
+            if teach_id not in groups:
+                status = Teach.resolve_status(finished, teach_date, offset)
+                groups[teach_id] = {"status": status, "levels": [], "periods": []}
+            groups[teach_id]["levels"].append(level)
+            groups[teach_id]["periods"].append(order)
+
+        for assignment in assignments:
+            group = groups[assignment.teach.group_id]
+            assignment.status = group["status"]
+            assignment.level_list = list(set(group["levels"]))
+            assignment.period_list = list(set(group["periods"]))
+        return assignments
+
+
+# A night's structure saved for reuse, built and applied by cloning.NightCopier
+class NightTemplate(models.Model):
+    name = models.CharField(max_length=128, unique=True)
+    structure = models.JSONField()
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def create(cls, name: str, structure: dict):
+        return cls.objects.create(name=name, structure=structure)
+
 
 class MapSeniorNight(models.Model):
     DATALIST_SUGGESTIONS = ["Duty NCO", "Floater"]
@@ -648,9 +963,13 @@ class MapSeniorNight(models.Model):
         return sorted(instructors, key=role_priority)
 
     @classmethod
-    def get_senior_queryset_after_date(cls, senior: Senior, date: date):
+    def get_senior_queryset_after_date(
+        cls, senior: Senior, date: date, detailed: bool = False
+    ):
         queryset = cls.objects.filter(
             senior=senior,
             night__date__gte=date,  # trainingnight date is before date
         )
+        if detailed:
+            return queryset.select_related("night").annotate(date=F("night__date"))
         return queryset
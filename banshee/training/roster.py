@@ -0,0 +1,141 @@
+import csv
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import caches
+from .models import Level, Senior
+
+
+# Workers started with spawn instead of fork need django set up themselves
+def init_worker():
+    django.setup()
+
+
+def hash_password(password: str):
+    return make_password(password)
+
+
+class RosterProvisioner:
+    """
+    Creates Users and their Seniors from roster rows with username, password,
+    level (number or name) and optionally permission keys. Hashing passwords
+    is nearly all of the cost, so it runs in a process pool and the rows are
+    written with bulk inserts in one transaction. Usernames that already
+    exist are skipped, any invalid row stops the whole roster.
+    """
+
+    HASH_CHUNK_SIZE = 8
+
+    def __init__(self, workers: int = None, dry_run: bool = False):
+        self.workers = workers
+        self.dry_run = dry_run
+        self.errors = []  # (line, message)
+        self.skipped = []  # Usernames that already have an account
+
+    # Readers
+    @staticmethod
+    def read_csv(file):
+        for row in csv.DictReader(file):
+            yield row
+
+    def clean_row(self, row: dict):
+        username = (row.get("username") or "").strip()
+        password = row.get("password") or ""
+        level = (row.get("level") or "").strip()
+        permission = (row.get("permission") or "").strip()
+
+        User.username_validator(username)
+        if not password:
+            raise ValidationError("A password is required.")
+        validate_password(password, User(username=username))
+
+        registry = Level.get_registry()
+        try:
+            if level.isdigit():
+                level = registry.get_by_number(level)
+            else:
+                level = registry.get_by_name(level)
+        except Level.DoesNotExist:
+            raise ValidationError(f"Unknown level '{level}'.")
+
+        permissions = [choice[0] for choice in Senior.PERMISSION_CHOICES]
+        if permission == "":
+            permission = Senior.STANDARD_INSTRUCTOR
+        elif not permission.isdigit() or int(permission) not in permissions:
+            raise ValidationError(f"Unknown permission level '{permission}'.")
+
+        return {
+            "username": username,
+            "password": password,
+            "level": level,
+            "permission": int(permission),
+        }
+
+    def clean_rows(self, rows):
+        cleaned = {}
+        for line, row in enumerate(rows, 2):  # Line 1 is the header
+            try:
+                data = self.clean_row(row)
+            except ValidationError as error:
+                self.errors.append((line, " ".join(error.messages)))
+                continue
+            if data["username"] in cleaned:
+                self.errors.append((line, f"{data['username']} is listed twice."))
+                continue
+            cleaned[data["username"]] = data
+
+        existing = set(
+            User.objects.filter(username__in=list(cleaned)).values_list(
+                "username", flat=True
+            )
+        )
+        self.skipped = sorted(existing)
+        return [data for data in cleaned.values() if data["username"] not in existing]
+
+    def hash_passwords(self, passwords: list):
+        with ProcessPoolExecutor(self.workers, initializer=init_worker) as executor:
+            return list(
+                executor.map(hash_password, passwords, chunksize=self.HASH_CHUNK_SIZE)
+            )
+
+    # Returns the usernames created, or that would be without dry_run
+    def provision(self, rows):
+        rows = self.clean_rows(rows)
+        if self.errors or not rows:
+            return []
+        usernames = [row["username"] for row in rows]
+        if self.dry_run:
+            return usernames
+
+        passwords = self.hash_passwords([row["password"] for row in rows])
+        with transaction.atomic():
+            User.objects.bulk_create(
+                [
+                    User(username=row["username"], password=password)
+                    for row, password in zip(rows, passwords)
+                ],
+                batch_size=500,
+            )
+            # Read back so new users have ids on every database
+            users = User.objects.in_bulk(usernames, field_name="username")
+            Senior.objects.bulk_create(
+                [
+                    Senior(
+                        user=users[row["username"]],
+                        level=row["level"],
+                        permission_level=row["permission"],
+                    )
+                    for row in rows
+                ],
+                batch_size=500,
+            )
+
+        # bulk_create skips the signals that refresh directory.senior_directory
+        caches.bump_senior_version()
+        return usernames
@@ -1,9 +1,122 @@
 from django.dispatch import receiver
-from .models import TrainingPeriod
-from django.db.models.signals import pre_delete
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from .models import (
+    Activity,
+    GenericLesson,
+    Lesson,
+    Level,
+    MapSeniorNight,
+    MapSeniorTeach,
+    PerformanceObjective,
+    Senior,
+    Teach,
+    TeachGroup,
+    TrainingNight,
+    TrainingPeriod,
+)
+from . import caches
+from django.db.models.signals import pre_delete, post_save, post_delete
 
 
+# Nights are normally deleted with TrainingNight.delete_range, this covers
+# periods deleted one at a time
 @receiver(pre_delete, sender=TrainingPeriod)
 def delete_trainingperiod(sender, instance: TrainingPeriod, **kwargs):
-    for teach in instance.get_teach_instances():
-        teach.delete()
+    TrainingPeriod.delete_teachs(TrainingPeriod.objects.filter(pk=instance.pk))
+    caches.bump_night_versions([instance.night_id])
+
+
+# Schedule cache invalidation
+@receiver([post_save, post_delete], sender=TrainingPeriod)
+@receiver([post_save, post_delete], sender=MapSeniorNight)
+def bump_night_version(sender, instance, **kwargs):
+    caches.bump_night_versions([instance.night_id])
+
+
+@receiver([post_save, post_delete], sender=Teach)
+def bump_teach_night_version(sender, instance: Teach, **kwargs):
+    if Teach.period.is_cached(instance):
+        night_ids = [instance.period.night_id]
+    else:
+        night_ids = TrainingPeriod.objects.filter(pk=instance.period_id).values_list(
+            "night_id", flat=True
+        )
+    caches.bump_night_versions(night_ids)
+
+
+@receiver([post_save, post_delete], sender=MapSeniorTeach)
+def bump_assignment_night_version(sender, instance: MapSeniorTeach, **kwargs):
+    night_ids = Teach.objects.filter(pk=instance.teach_id).values_list(
+        "period__night_id", flat=True
+    )
+    caches.bump_night_versions(night_ids)
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+@receiver([post_save, post_delete], sender=Activity)
+@receiver([post_save, post_delete], sender=GenericLesson)
+def bump_content_night_version(sender, instance, created=False, **kwargs):
+    if created:  # Nothing can be teaching new content yet
+        return
+    night_ids = Teach.objects.filter(
+        group__content_type=ContentType.objects.get_for_model(sender),
+        group__object_id=instance.pk,
+    ).values_list("period__night_id", flat=True)
+    caches.bump_night_versions(night_ids)
+
+
+# Teach.group is PROTECT, so a group is only ever deleted once no slot is left
+# on a night and needs no post_delete receiver
+@receiver(post_save, sender=TeachGroup)
+def bump_group_night_version(sender, instance: TeachGroup, **kwargs):
+    night_ids = Teach.objects.filter(group_id=instance.pk).values_list(
+        "period__night_id", flat=True
+    )
+    caches.bump_night_versions(night_ids)
+
+
+# Lesson catalogue invalidation, for catalogue.lesson_index
+@receiver([post_save, post_delete], sender=Lesson)
+@receiver([post_save, post_delete], sender=PerformanceObjective)
+def bump_lesson_version(sender, instance, **kwargs):
+    caches.bump_lesson_version()
+
+
+# Level registry invalidation, after commit so no process reloads the old rows
+# under the new version
+@receiver([post_save, post_delete], sender=Level)
+def bump_level_version(sender, instance: Level, **kwargs):
+    transaction.on_commit(caches.bump_level_version)
+
+
+# Dashboard calendar cache invalidation
+@receiver([post_save, post_delete], sender=TrainingNight)
+def bump_month_version(sender, instance: TrainingNight, **kwargs):
+    caches.bump_month_version(instance.date.year, instance.date.month)
+
+
+# Schedules show usernames, but logging in only touches last_login
+@receiver(post_save, sender=User)
+def bump_user_night_version(sender, instance: User, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    night_ids = MapSeniorTeach.objects.filter(senior__user=instance).values_list(
+        "teach__period__night_id", flat=True
+    )
+    caches.bump_night_versions(night_ids)
+
+
+# Senior directory invalidation, for directory.senior_directory
+@receiver([post_save, post_delete], sender=Senior)
+@receiver(post_delete, sender=User)
+def bump_senior_version(sender, instance, **kwargs):
+    transaction.on_commit(caches.bump_senior_version)
+
+
+@receiver(post_save, sender=User)
+def bump_user_senior_version(sender, instance: User, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    transaction.on_commit(caches.bump_senior_version)
@@ -0,0 +1,373 @@
+from collections import namedtuple
+from datetime import date
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import caches
+from .availability import AvailabilityMatrix
+from .models import (
+    EmptyLesson,
+    MapSeniorNight,
+    MapSeniorTeach,
+    Senior,
+    Teach,
+    TrainingNight,
+)
+
+# A role to fill: kind is "night" (target is a TrainingNight id) or "teach"
+# (target is the id of the parent Teach of a teach group)
+Slot = namedtuple("Slot", ["night_id", "kind", "target_id", "role"])
+Assignment = namedtuple("Assignment", ["slot", "senior"])
+
+
+class FlowNetwork:
+    """
+    Integer max flow (Dinic). Edges are [target, residual capacity, reverse
+    edge] lists so capacities can be raised between runs.
+    """
+
+    def __init__(self, size: int):
+        self.edges = [[] for _ in range(size)]
+
+    def add_edge(self, source: int, target: int, capacity: int):
+        forward = [target, capacity, None]
+        backward = [source, 0, forward]
+        forward[2] = backward
+        self.edges[source].append(forward)
+        self.edges[target].append(backward)
+        return forward
+
+    @staticmethod
+    def get_flow(edge):
+        return edge[2][1]
+
+    def max_flow(self, source: int, sink: int):
+        total = 0
+        while True:
+            level = self.get_levels(source)
+            if level[sink] < 0:
+                return total
+            pointers = [0] * len(self.edges)
+            pushed = self.augment(source, sink, level, pointers)
+            while pushed:
+                total += pushed
+                pushed = self.augment(source, sink, level, pointers)
+
+    def get_levels(self, source: int):
+        level = [-1] * len(self.edges)
+        level[source] = 0
+        queue = [source]
+        for node in queue:
+            for target, capacity, _ in self.edges[node]:
+                if capacity > 0 and level[target] < 0:
+                    level[target] = level[node] + 1
+                    queue.append(target)
+        return level
+
+    # Finds one augmenting path in the level graph without recursion
+    def augment(self, source: int, sink: int, level: list, pointers: list):
+        path = []
+        node = source
+        while node != sink:
+            edges = self.edges[node]
+            while pointers[node] < len(edges):
+                edge = edges[pointers[node]]
+                if edge[1] > 0 and level[edge[0]] == level[node] + 1:
+                    break
+                pointers[node] += 1
+            else:
+                if not path:
+                    return 0
+                level[node] = -1  # Dead end, never visit again this phase
+                node = path.pop()[2][0]
+                pointers[node] += 1
+                continue
+            path.append(edge)
+            node = edge[0]
+
+        pushed = min(edge[1] for edge in path)
+        for edge in path:
+            edge[1] -= pushed
+            edge[2][1] += pushed
+        return pushed
+
+
+class StaffingPlan:
+    """
+    Fills the open IC/Mod/ADI and Duty NCO/Floater roles of every night in a
+    date range. Who works which night is a min cost flow, seniors -> nights
+    with one slot per senior per night, where every extra night a senior
+    works costs more than the last. With costs only on the source edges
+    this reduces to raising every senior's capacity one night at a time and
+    topping up a max flow, which balances load across the whole term.
+    """
+
+    def __init__(
+        self,
+        start: date,
+        end: date,
+        teach_roles: list = MapSeniorTeach.DATALIST_SUGGESTIONS,
+        night_roles: list = MapSeniorNight.DATALIST_SUGGESTIONS,
+    ):
+        self.start = start
+        self.end = end
+        self.teach_roles = teach_roles
+        self.night_roles = night_roles
+
+        self.matrix = AvailabilityMatrix(start, end)
+        self.nights = {night.id: night for night in self.matrix.nights}
+        self.seniors = {senior.id: senior for senior in self.matrix.seniors}
+
+        self.slots = self.get_open_slots()
+        self.assignments = self.solve()
+
+        assigned = {assignment.slot for assignment in self.assignments}
+        self.unfilled = [slot for slot in self.slots if slot not in assigned]
+
+    # Slots
+    def get_open_slots(self):
+        slots = []
+        night_ids = list(self.nights)
+
+        filled = {}
+        rows = MapSeniorNight.objects.filter(night_id__in=night_ids).values_list(
+            "night_id", "role"
+        )
+        for night_id, role in rows:
+            filled.setdefault(night_id, set()).add(role.lower())
+        for night_id in night_ids:
+            for role in self.night_roles:
+                if role.lower() not in filled.get(night_id, set()):
+                    slots.append(Slot(night_id, "night", night_id, role))
+
+        # Only the parent (first instance) of each teach group gets assignments
+        empty_type = ContentType.objects.get_for_model(EmptyLesson)
+        instances = (
+            Teach.objects.filter(period__night_id__in=night_ids)
+            .exclude(group__content_type=empty_type)
+            .order_by("id")
+            .values_list("id", "group_id", "period__night_id")
+        )
+        parents = {}
+        for pk, teach_id, night_id in instances:
+            parents.setdefault(teach_id, (pk, night_id))
+        self.teach_ids = {pk: teach_id for teach_id, (pk, _) in parents.items()}
+
+        filled = {}
+        rows = MapSeniorTeach.objects.filter(
+            teach_id__in=[pk for pk, night_id in parents.values()]
+        ).values_list("teach_id", "role")
+        for pk, role in rows:
+            filled.setdefault(pk, set()).add(role.lower())
+        for pk, night_id in sorted(parents.values()):
+            for role in self.teach_roles:
+                if role.lower() not in filled.get(pk, set()):
+                    slots.append(Slot(night_id, "teach", pk, role))
+
+        return slots
+
+    def get_eligible_seniors(self):
+        instructor_ids = set(Senior.instructors.values_list("id", flat=True))
+        return [
+            senior
+            for senior in self.matrix.seniors
+            if senior.id in instructor_ids and not senior.discluded_assignment
+        ]
+
+    # Solving
+    def solve(self):
+        demand = {}
+        for slot in self.slots:
+            demand[slot.night_id] = demand.get(slot.night_id, 0) + 1
+        if not demand:
+            return []
+
+        seniors = self.get_eligible_seniors()
+        nights = [night_id for night_id in self.nights if night_id in demand]
+
+        # Nodes: source, sink, seniors, nights. A senior -> night edge with
+        # capacity 1 keeps every senior to one new slot per night
+        source, sink = 0, 1
+        senior_nodes = {senior.id: 2 + i for i, senior in enumerate(seniors)}
+        night_nodes = {
+            night_id: 2 + len(seniors) + i for i, night_id in enumerate(nights)
+        }
+        network = FlowNetwork(2 + len(seniors) + len(nights))
+
+        senior_edges = {}
+        pair_edges = {}
+        for senior in seniors:
+            senior_edges[senior.id] = network.add_edge(
+                source, senior_nodes[senior.id], 0
+            )
+            for night_id in nights:
+                if self.matrix.is_free_for_night(senior.id, night_id):
+                    pair_edges[(senior.id, night_id)] = network.add_edge(
+                        senior_nodes[senior.id], night_nodes[night_id], 1
+                    )
+        for night_id in nights:
+            network.add_edge(night_nodes[night_id], sink, demand[night_id])
+
+        loads = {senior.id: self.matrix.get_load(senior.id) for senior in seniors}
+        total_demand = sum(demand.values())
+        flow = 0
+        for limit in range(1, len(nights) + max(loads.values(), default=0) + 1):
+            for senior_id, edge in senior_edges.items():
+                used = FlowNetwork.get_flow(edge)
+                edge[1] = max(0, limit - loads[senior_id]) - used
+            flow += network.max_flow(source, sink)
+            if flow == total_demand:
+                break
+
+        working = {}
+        for (senior_id, night_id), edge in pair_edges.items():
+            if FlowNetwork.get_flow(edge):
+                working.setdefault(night_id, []).append(self.seniors[senior_id])
+        return self.assign_roles(working)
+
+    # Hands the night's slots to the seniors working it, spreading each role
+    def assign_roles(self, working: dict):
+        role_counts = {}
+        assignments = []
+        for night_id in self.nights:
+            seniors = working.get(night_id, [])
+            night_slots = [slot for slot in self.slots if slot.night_id == night_id]
+            # Every teach gets its IC before any teach gets an ADI
+            night_slots.sort(key=self.get_role_priority)
+            for slot in night_slots[: len(seniors)]:
+                senior = min(
+                    seniors,
+                    key=lambda senior: (
+                        role_counts.get((senior.id, slot.role), 0),
+                        senior.id,
+                    ),
+                )
+                seniors.remove(senior)
+                role_counts[(senior.id, slot.role)] = (
+                    role_counts.get((senior.id, slot.role), 0) + 1
+                )
+                assignments.append(Assignment(slot, senior))
+        return assignments
+
+    def get_role_priority(self, slot: Slot):
+        roles = self.night_roles if slot.kind == "night" else self.teach_roles
+        return roles.index(slot.role)
+
+    # Preview and commit
+    def get_slot_label(self, slot: Slot):
+        if slot.kind == "night":
+            return f"{slot.role} of night"
+        return f"{slot.role} of teach {self.teach_ids[slot.target_id]}"
+
+    # [(night, [(label, senior)], [unfilled labels])] in date order
+    def get_preview(self):
+        preview = []
+        for night in sorted(self.nights.values(), key=lambda night: night.date):
+            rows = [
+                (self.get_slot_label(assignment.slot), assignment.senior)
+                for assignment in self.assignments
+                if assignment.slot.night_id == night.id
+            ]
+            unfilled = [
+                self.get_slot_label(slot)
+                for slot in self.unfilled
+                if slot.night_id == night.id
+            ]
+            preview.append((night, rows, unfilled))
+        return preview
+
+    def get_conflicts(self):
+        planned = {
+            (assignment.senior.id, assignment.slot.night_id)
+            for assignment in self.assignments
+        }
+        night_ids = list(self.nights)
+        current = set(
+            MapSeniorNight.objects.filter(night_id__in=night_ids).values_list(
+                "senior_id", "night_id"
+            )
+        )
+        current |= set(
+            MapSeniorTeach.objects.filter(
+                teach__period__night_id__in=night_ids
+            ).values_list("senior_id", "teach__period__night_id")
+        )
+        return planned & current
+
+    # Planned slots whose role was filled, or whose night or teach was
+    # deleted, since the plan was made. Locks the target rows first so
+    # overlapping commits wait for each other instead of both writing a role
+    def get_taken_slots(self):
+        slots = [assignment.slot for assignment in self.assignments]
+        night_ids = {slot.target_id for slot in slots if slot.kind == "night"}
+        teach_ids = {slot.target_id for slot in slots if slot.kind == "teach"}
+        targets = {
+            ("night", pk)
+            for pk in TrainingNight.objects.select_for_update()
+            .filter(id__in=night_ids)
+            .values_list("id", flat=True)
+        }
+        targets |= {
+            ("teach", pk)
+            for pk in Teach.objects.select_for_update()
+            .filter(id__in=teach_ids)
+            .values_list("id", flat=True)
+        }
+
+        filled = {
+            ("night", pk, role.lower())
+            for pk, role in MapSeniorNight.objects.filter(
+                night_id__in=night_ids
+            ).values_list("night_id", "role")
+        }
+        filled |= {
+            ("teach", pk, role.lower())
+            for pk, role in MapSeniorTeach.objects.filter(
+                teach_id__in=teach_ids
+            ).values_list("teach_id", "role")
+        }
+        return [
+            slot
+            for slot in slots
+            if (slot.kind, slot.target_id) not in targets
+            or (slot.kind, slot.target_id, slot.role.lower()) in filled
+        ]
+
+    def commit(self):
+        with transaction.atomic():
+            if self.get_taken_slots() or self.get_conflicts():
+                raise ValidationError(
+                    "Assignments changed since this plan was made, please solve again."
+                )
+
+            MapSeniorNight.objects.bulk_create(
+                [
+                    MapSeniorNight(
+                        night_id=assignment.slot.target_id,
+                        senior=assignment.senior,
+                        role=assignment.slot.role,
+                    )
+                    for assignment in self.assignments
+                    if assignment.slot.kind == "night"
+                ]
+            )
+            MapSeniorTeach.objects.bulk_create(
+                [
+                    MapSeniorTeach(
+                        teach_id=assignment.slot.target_id,
+                        senior=assignment.senior,
+                        role=assignment.slot.role,
+                    )
+                    for assignment in self.assignments
+                    if assignment.slot.kind == "teach"
+                ]
+            )
+
+        # bulk_create skips the signals that invalidate cached schedules. The
+        # bump waits for the commit so no request caches the old roles again
+        caches.bump_night_versions(
+            [assignment.slot.night_id for assignment in self.assignments]
+        )
+        return len(self.assignments)
@@ -0,0 +1,24 @@
+// Suggests lessons for the eocode field and fills in the title of a known code
+function suggestlessons(input, url) {
+    fetch(url + "?q=" + encodeURIComponent(input.value), {
+        headers: {
+            Accept: "application/json",
+        },
+    })
+        .then((response) => response.json())
+        .then((lessons) => {
+            let datalist = document.getElementById("eocode_datalist");
+            datalist.innerHTML = "";
+            for (let lesson of lessons) {
+                let option = document.createElement("option");
+                option.value = lesson.eocode;
+                option.textContent = lesson.title;
+                datalist.appendChild(option);
+
+                let title = document.getElementById("id_title");
+                if (title && !title.value && lesson.eocode.toLowerCase() === input.value.trim().toLowerCase()) {
+                    title.value = lesson.title;
+                }
+            }
+        })
+}
@@ -12,6 +12,11 @@ from .views import (
     TeachView,
     DiscludeSeniorFormView,
     TrainingNightDetailView,
+    TrainingTermView,
+    LessonSearchView,
+    TrainingNightCopyView,
+    NightTemplateView,
+    NightTemplateCopyView,
     SeniorDetailView,
 )
 
@@ -51,5 +56,22 @@ urlpatterns = [
         TrainingNightDetailView.as_view(),
         name="api-trainingnight",
     ),
+    path("api/term/", TrainingTermView.as_view(), name="api-trainingterm"),
+    path("api/lessons/", LessonSearchView.as_view(), name="api-lessons"),
+    path(
+        "api/night/<int:pk>/copy/",
+        TrainingNightCopyView.as_view(),
+        name="api-trainingnight-copy",
+    ),
+    path(
+        "api/night/<int:night_id>/template/",
+        NightTemplateView.as_view(),
+        name="api-nighttemplate",
+    ),
+    path(
+        "api/template/<int:pk>/copy/",
+        NightTemplateCopyView.as_view(),
+        name="api-nighttemplate-copy",
+    ),
     path("api/<int:senior_id>/", SeniorDetailView.as_view(), name="api-senior"),
 ]
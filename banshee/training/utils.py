@@ -1,16 +1,106 @@
 from calendar import HTMLCalendar
+from datetime import date, timedelta
 from .models import *
+from . import caches
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Prefetch
 from django.urls import reverse
 
 
+class NightGrid:
+    """
+    Loads the periods, teaches, content and instructor assignments of a night
+    in a fixed number of queries so a schedule can be rendered from memory.
+    """
+
+    def __init__(self, night: TrainingNight):
+        self.night = night
+        self.periods = list(night.get_periods())
+
+        assignments = MapSeniorTeach.objects.select_related("senior__user")
+        teachs = (
+            Teach.objects.filter(period__night=night)
+            .select_related("period__night", "group")
+            .prefetch_related(
+                "group__content",
+                Prefetch("mapseniorteach_set", queryset=assignments),
+            )
+            .order_by("level__name")
+        )
+
+        # Multi-slot teaches never leave their night, so the parent (first
+        # instance of a group) is always among the teaches loaded here
+        parents = {}
+        for teach in sorted(teachs, key=lambda teach: teach.id):
+            parents.setdefault(teach.group_id, teach)
+
+        self.cells = {period.id: [] for period in self.periods}
+        for teach in teachs:
+            teach._parent_instance = parents[teach.group_id]
+            self.cells[teach.period_id].append(teach)
+
+    def get_rows(self):
+        return [(period, self.cells[period.id]) for period in self.periods]
+
+
+class SlotMatrix:
+    """
+    The periods x junior levels of a night for the teach editor, marking the
+    slots held by one teach group. The group's slots come from one query
+    joined with the group, so the view and its form share a single load.
+    """
+
+    def __init__(self, night_id: int, group_id: int = None):
+        self.night_id = night_id
+        self.levels = Level.get_registry().juniors
+        self.periods = list(
+            TrainingPeriod.objects.filter(night_id=night_id).order_by("order")
+        )
+        if not self.periods:
+            TrainingNight.nights.get(pk=night_id)  # Raises for a missing night
+
+        self.teach = None
+        self.slots = set()
+        if group_id != None:
+            teachs = list(
+                Teach.objects.filter(group_id=group_id)
+                .select_related("group")
+                .order_by("id")
+            )
+            if not teachs:
+                raise ObjectDoesNotExist("Teach ID not Found")
+            self.teach = teachs[0]  # The parent instance
+            self.slots = {(teach.period_id, teach.level_id) for teach in teachs}
+
+    # "checked" or "" for every checkbox, in the form's period and level order
+    def get_slot_initial(self):
+        if self.teach == None:
+            return None
+        return [
+            [
+                "checked" if (period.id, level.id) in self.slots else ""
+                for level in self.levels
+            ]
+            for period in self.periods
+        ]
+
+    def get_content_initial(self):
+        if self.teach == None:
+            return {}
+        return self.teach.get_form_content_initial()
+
+
 class TrainingDaySchedule:
+    cache_variant = "view"
+
     def formatlesson(self, lesson: Teach):
         return f"<td><a href='{lesson.get_absolute_url()}' class='block p-2 w-auto min-h-24 bg-clr-1 hover:bg-green-900 rounded-lg shadow-md'>{lesson.format_html_block()}</a></td>"
 
-    def formatperiod(self, periodnum: int, period: TrainingPeriod):
+    def formatperiod(self, periodnum: int, period: TrainingPeriod, lessons: list):
         period_html = f"<th>P{str(periodnum)}</th>"
 
-        for lesson in period.get_teach_instances():
+        for lesson in lessons:
             period_html += self.formatlesson(lesson)
 
         return f"<tr>{period_html}</tr>"
@@ -23,22 +113,52 @@ class TrainingDaySchedule:
 
         return f"<tr>{header}</tr>"
 
+    def get_cache_key(self, night: TrainingNight, levels: list):
+        version = caches.get_night_version(night.id)
+        level_names = "-".join(str(level) for level in levels)
+        return (
+            f"training:schedule:{self.cache_variant}:{night.id}:{version}:{level_names}"
+        )
+
+    # Rendered schedules are shared by every viewer until the night changes
     def formatschedule(self, night: TrainingNight, levels: list):
+        key = self.get_cache_key(night, levels)
+        schedule = cache.get(key)
+        if schedule is None:
+            schedule = self.formatgrid(NightGrid(night), levels)
+            cache.set(key, schedule, caches.FRAGMENT_TIMEOUT)
+        return schedule
+
+    def formatgrid(self, grid: NightGrid, levels: list):
         schedule = self.formatheader(levels)
-        for number, period in enumerate(night.get_periods(), 1):
-            schedule += self.formatperiod(number, period)
+        for number, (period, lessons) in enumerate(grid.get_rows(), 1):
+            schedule += self.formatperiod(number, period, lessons)
 
         return schedule
 
 
 class EditTrainingDaySchedule(TrainingDaySchedule):
+    cache_variant = "edit"
+
     def formatlesson(self, lesson: Teach):
         return f"<td><a href='{lesson.get_absolute_edit_url()}' class='block p-2 w-auto min-h-24 bg-blue-700 hover:bg-blue-900 rounded-lg shadow-md'>{lesson.format_html_block()}</a></td>"
 
 
 class DueTrainingDaySchedule(TrainingDaySchedule):
+    cache_variant = "due"
+
+    # Statuses also depend on the current date and the due date setting
+    def get_cache_key(self, night: TrainingNight, levels: list):
+        key = super(DueTrainingDaySchedule, self).get_cache_key(night, levels)
+        offset = TrainingSetting.get_duedateoffset()
+        return f"{key}:{date.today()}:{offset}"
+
+    def formatgrid(self, grid: NightGrid, levels: list):
+        self.statuses = Teach.get_night_statuses(grid.night)
+        return super(DueTrainingDaySchedule, self).formatgrid(grid, levels)
+
     def formatlesson(self, lesson: Teach):
-        status = lesson.get_status()
+        status = self.statuses[lesson.group_id]
 
         if status == "Submitted":
             return f"<td><a href='{lesson.get_absolute_url()}' class='block p-2 w-auto min-h-24 bg-banshee-green-800 hover:bg-green-900 rounded-lg shadow-md text-black'>{lesson.format_html_block()}</a></td>"
@@ -51,14 +171,14 @@ class DueTrainingDaySchedule(TrainingDaySchedule):
 
 class ViewDashboardCalendar(HTMLCalendar):
     def formatday(self, day, events, today):
-        event_today = events.filter(date__day=day).exists()
+        event_today = day in events
         href = "#"
         d = ""
         if event_today:
             d += (
                 " small-day-green-highlight"  # space nesscary to keep classes seperated
             )
-            event_instance = events.get(date__day=day)
+            event_instance = events[day]
             href = reverse("trainingnight", args=[event_instance.pk])
         if day != 0 and today != None:
             if day == today.day:
@@ -78,7 +198,7 @@ class ViewDashboardCalendar(HTMLCalendar):
 
 class CreateDashboardCalendar(HTMLCalendar):
     def formatday(self, day, events, today):
-        event_today = events.filter(date__day=day).exists()
+        event_today = day in events
         href = reverse("api-trainingnight", args=[self.year, self.month, day])
 
         if event_today:
@@ -96,7 +216,7 @@ class CreateDashboardCalendar(HTMLCalendar):
 
 class DeleteDashboardCalendar(HTMLCalendar):
     def formatday(self, day, events, today):
-        event_today = events.filter(date__day=day).exists()
+        event_today = day in events
         href = reverse("api-trainingnight", args=[self.year, self.month, day])
 
         if event_today:
@@ -110,7 +230,7 @@ class DeleteDashboardCalendar(HTMLCalendar):
 class DashboardCalendar(HTMLCalendar):
     view: ViewDashboardCalendar
 
-    def __init__(self, view, year=None, month=None):
+    def __init__(self, view, year=None, month=None, use_cache=False):
         if view == "view":
             self.view = ViewDashboardCalendar
         elif view == "create":
@@ -118,8 +238,10 @@ class DashboardCalendar(HTMLCalendar):
         elif view == "delete":
             self.view = DeleteDashboardCalendar
 
+        self.view_name = view
         self.year = year
         self.month = month
+        self.use_cache = use_cache
         super(DashboardCalendar, self).__init__()
 
     def formatweek(self, theweek, events, today):
@@ -130,13 +252,42 @@ class DashboardCalendar(HTMLCalendar):
             )  # Call function based on view
         return f"<tr> {week} </tr>"
 
-    def formatmonth(self, nights, today, withyear=True):
-        events = nights
+    def get_cache_key(self, today):
+        version = caches.get_month_version(self.year, self.month)
+        return f"training:calendar:{self.view_name}:{self.year}-{self.month}:{version}:{today}"
 
+    def formatmonth(self, nights, today, withyear=True):
         if not self.year == today.year or not self.month == today.month:
             today = None
 
+        if not self.use_cache:
+            return self.formatevents(nights, today)
+
+        key = self.get_cache_key(today)
+        cal = cache.get(key)
+        if cal is None:
+            cal = self.formatevents(nights, today)
+            cache.set(key, cal, caches.FRAGMENT_TIMEOUT)
+        return cal
+
+    def formatevents(self, nights, today):
+        # Index the month's nights by day so formatday never has to query
+        events = {night.date.day: night for night in nights}
+
         cal = ""
         for week in self.monthdays2calendar(self.year, self.month):
             cal += f"{self.formatweek(week, events, today)}\n"
         return cal
+
+
+# Every date falling on weekday (0 is Monday) from start to end, minus skip
+def get_recurring_dates(start: date, end: date, weekday: int, skip: list = []):
+    skip = set(skip)
+    dates = []
+
+    day = start + timedelta(days=(weekday - start.weekday()) % 7)
+    while day <= end:
+        if day not in skip:
+            dates.append(day)
+        day += timedelta(days=7)
+    return dates
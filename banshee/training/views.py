@@ -4,7 +4,7 @@ from datetime import date, datetime, timedelta
 from django.views.generic import TemplateView, FormView
 from django.views import View
 from django.urls import reverse_lazy
-from django.shortcuts import render, redirect
+from django.shortcuts import get_object_or_404, render, redirect
 from django.utils.safestring import mark_safe
 from django.contrib import messages
 
@@ -12,7 +12,15 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import MapSeniorNight, MapSeniorTeach, TrainingNight, Level, Teach, Senior
+from .models import (
+    MapSeniorNight,
+    MapSeniorTeach,
+    NightTemplate,
+    TrainingNight,
+    Level,
+    Teach,
+    Senior,
+)
 from .forms import (
     AssignTeachFormset,
     AssignNightFormset,
@@ -21,11 +29,18 @@ from .forms import (
     LessonTeachForm,
     ActivityTeachForm,
     TeachPlanForm,
+    TrainingTermForm,
+    NightCopyForm,
+    NightTemplateForm,
 )
+from .cloning import NightCopier
+from .catalogue import lesson_index
+from .directory import senior_directory
 from .utils import (
     DashboardCalendar,
     DueTrainingDaySchedule,
     EditTrainingDaySchedule,
+    SlotMatrix,
     TrainingDaySchedule,
 )
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
@@ -84,7 +99,7 @@ class DashboardView(LoginRequiredMixin, View):
         context["curr_month"] = curr_month(d)
         context["prev_month"] = prev_month(d)
         context["next_month"] = next_month(d)
-        cal = DashboardCalendar(view, d.year, d.month)
+        cal = DashboardCalendar(view, d.year, d.month, use_cache=True)
 
         nights = self.model.nights.filter(date__year=d.year, date__month=d.month)
         html_cal = cal.formatmonth(nights=nights, today=date.today(), withyear=True)
@@ -92,11 +107,11 @@ class DashboardView(LoginRequiredMixin, View):
         context["monthname"] = str(calendar.month_name[d.month]) + " " + str(d.year)
 
         teach_assignments = MapSeniorTeach.get_senior_queryset_after_date(
-            request.user.senior, date.today()
+            request.user.senior, date.today(), detailed=True
         )
         context["teach_assignments"] = teach_assignments
         night_assignments = MapSeniorNight.get_senior_queryset_after_date(
-            request.user.senior, date.today()
+            request.user.senior, date.today(), detailed=True
         )
         context["night_assignments"] = night_assignments
 
@@ -120,7 +135,7 @@ class TrainingNightView(LoginRequiredMixin, View):
         context["nightid"] = night_id
         night: TrainingNight = TrainingNight.objects.get(pk=night_id)
 
-        level_objects = Level.juniors.all()
+        level_objects = Level.get_registry().juniors
         levels = [level_object.name for level_object in level_objects]
         schedule_obj = self.schedule_class()
         schedule = schedule_obj.formatschedule(night, levels)
@@ -170,31 +185,26 @@ class TeachFormView(LoginRequiredMixin, UserPassesTestMixin, View):
     def test_func(self):
         return self.request.user.senior.is_training()
 
-    def init_form(self, levels, night_id, form_id, *args, **kwargs):
-        form = self.form_class[form_id][1](levels, night_id, *args, **kwargs)
+    def init_form(self, matrix, form_id, *args, **kwargs):
+        form = self.form_class[form_id][1](matrix, *args, **kwargs)
         return form
 
     def get(self, request, night_id, form_id, teach_id=None, *args, **kwargs):
-        levels = Level.juniors.all()
-        content_initial = {}
-        if teach_id == None:
-            slot_initial = None
-        else:
-            teach_instance = Teach.get_by_teach_id(teach_id)
-            content_initial.update(teach_instance.get_form_content_initial())
-            slot_initial = teach_instance.get_form_slot_initial()
+        matrix = SlotMatrix(night_id, teach_id)
+        content_initial = matrix.get_content_initial()
+        slot_initial = matrix.get_slot_initial()
 
         # As get_form_content_initial will override with blank string
         if content_initial["location"] == "":
             content_initial["location"] = Teach.DEFAULT_LOCATION
 
-        form = self.init_form(levels, night_id, form_id, initial=content_initial)
+        form = self.init_form(matrix, form_id, initial=content_initial)
         return render(
             request,
             self.template_name,
             {
                 "form": form,
-                "levels": levels,
+                "levels": matrix.levels,
                 "nightid": night_id,
                 "formid": form_id,
                 "slot_initial": slot_initial,
@@ -204,17 +214,14 @@ class TeachFormView(LoginRequiredMixin, UserPassesTestMixin, View):
         )
 
     def post(self, request, night_id, form_id, teach_id=None, *args, **kwargs):
-        levels = Level.juniors.all()
-        if teach_id == None:
-            form = self.init_form(levels, night_id, form_id, data=request.POST)
-            slot_initial = None
-        else:
-            teach_instance = Teach.get_by_teach_id(teach_id)
-            initial = teach_instance.get_form_content_initial()
-            slot_initial = teach_instance.get_form_slot_initial()
-            form = self.init_form(
-                levels, night_id, form_id, initial=initial, data=request.POST
-            )
+        matrix = SlotMatrix(night_id, teach_id)
+        slot_initial = matrix.get_slot_initial()
+        form = self.init_form(
+            matrix,
+            form_id,
+            initial=matrix.get_content_initial(),
+            data=request.POST,
+        )
         if form.is_valid():
             if form.has_changed():
                 form.save()
@@ -230,7 +237,7 @@ class TeachFormView(LoginRequiredMixin, UserPassesTestMixin, View):
             self.template_name,
             {
                 "form": form,
-                "levels": levels,
+                "levels": matrix.levels,
                 "nightid": night_id,
                 "formid": form_id,
                 "slot_initial": slot_initial,
@@ -249,8 +256,7 @@ class AssignTeachView(LoginRequiredMixin, UserPassesTestMixin, FormView):
         return self.request.user.senior.is_training()
 
     def init_form(self, teach_id, teach_instance, *args, **kwargs):
-        senior_queryset = Senior.instructors.all()
-        senior_choices = [(senior.id, str(senior)) for senior in senior_queryset]
+        senior_choices = senior_directory.get_instructor_choices()
         formset = self.formset_class(
             *args,
             form_kwargs={
@@ -259,7 +265,7 @@ class AssignTeachView(LoginRequiredMixin, UserPassesTestMixin, FormView):
                 "parent_instance": teach_instance,
             },
             instance=teach_instance,
-            **kwargs
+            **kwargs,
         )
         return formset
 
@@ -317,8 +323,7 @@ class AssignNightView(LoginRequiredMixin, UserPassesTestMixin, FormView):
         return context
 
     def init_form(self, night_id, night_instance, *args, **kwargs):
-        senior_queryset = Senior.instructors.all()
-        senior_choices = [(senior.id, str(senior)) for senior in senior_queryset]
+        senior_choices = senior_directory.get_instructor_choices()
         formset = self.formset_class(
             *args,
             form_kwargs={
@@ -327,7 +332,7 @@ class AssignNightView(LoginRequiredMixin, UserPassesTestMixin, FormView):
                 "parent_instance": night_instance,
             },
             instance=night_instance,
-            **kwargs
+            **kwargs,
         )
         return formset
 
@@ -363,21 +368,39 @@ class TeachView(LoginRequiredMixin, View):
     template_name = "training/teach.html"
     form_class = TeachPlanForm
 
+    # POST checks permissions before building the context, the request memo
+    # keeps that from loading the teach and its instructors twice
+    def get_teach(self, teach_id):
+        return self.request.memo.get_or_set(
+            ("teach", teach_id), lambda: Teach.get_by_teach_id(teach_id)
+        )
+
+    def get_instructors(self, instance):
+        return self.request.memo.get_or_set(
+            ("teach instructors", instance.group_id),
+            lambda: MapSeniorTeach.get_instructors(instance),
+        )
+
+    def can_edit_plan(self, instance):
+        return instance.can_edit_plan(
+            self.request.user.senior, self.get_instructors(instance)
+        )
+
     def get_context_data(self, teach_id, **kwargs):
         context = {}
-        instance = Teach.get_by_teach_id(teach_id)
+        instance = self.get_teach(teach_id)
 
         content_details = instance.get_content_attributes()
         content_type = instance.get_content_type()
         context["content"] = {"type": content_type, "attributes": content_details}
 
-        finished = instance.finished
+        finished = instance.group.finished
         context["plan"] = {"finished": finished}
         if finished:
-            context["plan"]["link"] = instance.plan
+            context["plan"]["link"] = instance.group.plan
 
-        context["assignments"] = MapSeniorTeach.get_instructors(instance)
-        context["can_edit_plan"] = instance.can_edit_plan(self.request.user.senior)
+        context["assignments"] = self.get_instructors(instance)
+        context["can_edit_plan"] = self.can_edit_plan(instance)
 
         context["night_id"] = instance.get_night_id()
 
@@ -390,8 +413,8 @@ class TeachView(LoginRequiredMixin, View):
         return render(request, self.template_name, context)
 
     def post(self, request, teach_id, *args, **kwargs):
-        teach_instance = Teach.get_by_teach_id(teach_id)
-        if teach_instance.can_edit_plan(request.user.senior):
+        teach_instance = self.get_teach(teach_id)
+        if self.can_edit_plan(teach_instance):
             form = self.form_class(teach_id, request.POST)
             context = self.get_context_data(teach_id)
             context.update({"form": form})
@@ -414,8 +437,7 @@ class DiscludeSeniorFormView(LoginRequiredMixin, UserPassesTestMixin, FormView):
 
     def get_form_kwargs(self):
         kwargs = super(DiscludeSeniorFormView, self).get_form_kwargs()
-        senior_queryset = Senior.seniors.all()
-        senior_choices = [(senior.id, str(senior)) for senior in senior_queryset]
+        senior_choices = senior_directory.get_senior_choices()
         kwargs["senior_choices"] = senior_choices
         return kwargs
 
@@ -440,12 +462,94 @@ class TrainingNightDetailView(LoginRequiredMixin, UserPassesTestMixin, APIView):
 
     def delete(self, request, year, month, day, *args, **kwargs):
         day = date(year, month, day)
-        instance = TrainingNight.nights.get_by_date(day)
-        instance.delete()
+        if not TrainingNight.delete_range(day):
+            return Response(status=status.HTTP_404_NOT_FOUND)
         messages.success(request, "Training Day Deleted.")
         return Response(status=status.HTTP_200_OK)
 
 
+# Creates a night on one weekday of every week between two dates
+class TrainingTermView(LoginRequiredMixin, UserPassesTestMixin, APIView):
+    http_method_names = ["post"]
+
+    # For UserPassesTestMixin
+    def test_func(self):
+        return self.request.user.senior.is_training()
+
+    def post(self, request, *args, **kwargs):
+        form = TrainingTermForm(request.data)
+        if not form.is_valid():
+            return Response(form.errors, status=status.HTTP_400_BAD_REQUEST)
+        nights = form.save()
+        messages.success(request, f"{len(nights)} Training Days Created.")
+        return Response(
+            {"created": [str(night.date) for night in nights]},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+# Suggestions for the eocode field of the lesson form
+class LessonSearchView(LoginRequiredMixin, APIView):
+    http_method_names = ["get"]
+
+    def get(self, request, *args, **kwargs):
+        lessons = lesson_index.search(request.query_params.get("q", ""))
+        return Response(
+            [
+                {"eocode": eocode, "title": title, "po_title": po_title}
+                for eocode, title, po_title in lessons
+            ]
+        )
+
+
+# Copies a night, optionally with its assignments, to many dates at once
+class TrainingNightCopyView(LoginRequiredMixin, UserPassesTestMixin, APIView):
+    http_method_names = ["post"]
+
+    # For UserPassesTestMixin
+    def test_func(self):
+        return self.request.user.senior.is_training()
+
+    def get_copier(self, pk):
+        return NightCopier.from_night(get_object_or_404(TrainingNight, pk=pk))
+
+    def post(self, request, pk, *args, **kwargs):
+        form = NightCopyForm(request.data)
+        if not form.is_valid():
+            return Response(form.errors, status=status.HTTP_400_BAD_REQUEST)
+        nights = form.save(self.get_copier(pk))
+        messages.success(request, f"{len(nights)} Training Days Created.")
+        return Response(
+            {"created": [str(night.date) for night in nights]},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class NightTemplateCopyView(TrainingNightCopyView):
+    def get_copier(self, pk):
+        return NightCopier(get_object_or_404(NightTemplate, pk=pk).structure)
+
+
+# Saves a night's structure as a template
+class NightTemplateView(LoginRequiredMixin, UserPassesTestMixin, APIView):
+    http_method_names = ["post"]
+
+    # For UserPassesTestMixin
+    def test_func(self):
+        return self.request.user.senior.is_training()
+
+    def post(self, request, night_id, *args, **kwargs):
+        night = get_object_or_404(TrainingNight, pk=night_id)
+        form = NightTemplateForm(request.data)
+        if not form.is_valid():
+            return Response(form.errors, status=status.HTTP_400_BAD_REQUEST)
+        template = form.save(night)
+        messages.success(request, "Template Saved.")
+        return Response(
+            {"id": template.id, "name": template.name}, status=status.HTTP_201_CREATED
+        )
+
+
 class SeniorDetailView(LoginRequiredMixin, UserPassesTestMixin, APIView):
     http_method_names = ["delete"]
 
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class SeniorBackend(ModelBackend):
+    """
+    ModelBackend that loads the user's Senior and Level in the same query
+    as the user, so permission checks like user.senior.is_training() and
+    the navbar don't cost a query each on every request.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related("senior__level").get(
+                pk=user_id
+            )
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
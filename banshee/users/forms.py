@@ -1,3 +1,5 @@
+import csv
+
 from django import forms
 from django.db.models.fields import BLANK_CHOICE_DASH
 from django.contrib.auth.forms import (
@@ -5,6 +7,7 @@ from django.contrib.auth.forms import (
     AuthenticationForm,
 )
 from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from django.contrib import messages
@@ -59,7 +62,7 @@ class SignupForm(UserCreationForm):
         self.fields["level"].choices = (
             self.BLANK_CHOICE_LEVEL
             + self.BLANK_CHOICE_DASH
-            + Level.seniors.get_choices()
+            + Level.get_registry().get_senior_choices()
         )
 
     class Meta:
@@ -152,15 +155,64 @@ class TrainingSettingsForm(forms.ModelForm):
 
 
 class AuthorizedUsernameForm(forms.Form):
-    usernames = CommaSeparatedCharField()
+    USERNAME_MAX_LENGTH = AuthorizedUsername._meta.get_field("username").max_length
+    CSV_HEADER = "username"
+
+    usernames = CommaSeparatedCharField(required=False)
+    file = forms.FileField(required=False)
+
+    # Usernames are read from the first column, a "username" header is skipped
+    def clean_file(self):
+        file = self.cleaned_data.get("file")
+        if not file:
+            return []
+
+        try:
+            lines = file.read().decode("utf-8-sig").splitlines()
+        except UnicodeDecodeError:
+            raise ValidationError("Please upload a UTF-8 encoded CSV file.")
+
+        usernames = []
+        for row in csv.reader(lines):
+            if not row or not row[0].strip():
+                continue
+            username = row[0].strip()
+            if username.lower() == self.CSV_HEADER:
+                continue
+            try:
+                validate_slug(username)
+            except ValidationError:
+                raise ValidationError("'%s' is not a valid slug." % username)
+            usernames.append(username)
+        return usernames
 
-    def save(self, request):
-        usernames = self.cleaned_data.get("usernames")
+    def clean(self):
+        cleaned_data = self.cleaned_data
+        usernames = set(cleaned_data.get("usernames", []))
+        usernames.update(cleaned_data.get("file", []))
 
+        if not usernames and not self.errors:
+            raise ValidationError("Please enter usernames or upload a CSV file.")
         for username in usernames:
-            obj, created = AuthorizedUsername.authorize_username(username)
-            if not created:
-                messages.warning(
-                    request,
-                    "Username %s already exists and as been skipped." % str(obj),
+            if len(username) > self.USERNAME_MAX_LENGTH:
+                raise ValidationError(
+                    "'%s' is longer than %d characters."
+                    % (username, self.USERNAME_MAX_LENGTH)
                 )
+
+        cleaned_data["usernames"] = sorted(usernames)
+        return cleaned_data
+
+    # One summary message instead of one per skipped username
+    def save(self, request):
+        usernames = self.cleaned_data.get("usernames")
+        added, skipped = AuthorizedUsername.authorize_usernames(usernames)
+
+        messages.success(request, "%d usernames added." % len(added))
+        if skipped:
+            messages.warning(
+                request,
+                "%d usernames already exist and have been skipped: %s"
+                % (len(skipped), ", ".join(skipped)),
+            )
+        return added, skipped
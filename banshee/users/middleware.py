@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY
+
+from banshee import versions
+
+
+class RequestMemo:
+    """
+    Values worked out once per request, keyed by anything hashable. Use it
+    for lookups that several parts of the same view would otherwise repeat.
+    """
+
+    def __init__(self):
+        self.values = {}
+
+    def get_or_set(self, key, function):
+        if key not in self.values:
+            self.values[key] = function()
+        return self.values[key]
+
+    def clear(self):
+        self.values = {}
+
+
+# Sessions started before SeniorBackend name ModelBackend, which is no longer
+# configured and would log them out. Moving them onto SeniorBackend keeps
+# them logged in and gives them the joined user load. Sessions last two
+# weeks, so this can go once every older one has expired
+class SessionBackendMiddleware:
+    LEGACY_BACKEND = "django.contrib.auth.backends.ModelBackend"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.session.get(BACKEND_SESSION_KEY) == self.LEGACY_BACKEND:
+            request.session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        return self.get_response(request)
+
+
+# Also makes the request read every shared cache version afresh, see
+# banshee.versions
+class RequestMemoMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.memo = RequestMemo()
+        versions.clear_checked_versions()
+        return self.get_response(request)
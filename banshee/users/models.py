@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
 
+from banshee import versions
+
 # Create your models here.
 class TrainingSetting(models.Model):
     duedateoffset = models.IntegerField(default=7)  # days before lesson
@@ -8,9 +10,16 @@ class TrainingSetting(models.Model):
         default=False
     )  # Should assign senior allow permission level 2
 
+    # Process memory copy of the singleton, see get_cached
+    VERSION_NAME = "settings"
+    cached_instance = None
+    cached_version = None
+
     def save(self, *args, **kwargs):
         self.pk = 1
         super(TrainingSetting, self).save(*args, **kwargs)
+        # After commit, so no worker can reload the old row under the new version
+        transaction.on_commit(lambda: versions.bump_version(self.VERSION_NAME))
 
     def delete(self, *args, **kwargs):
         pass
@@ -20,14 +29,25 @@ class TrainingSetting(models.Model):
         obj, created = cls.objects.get_or_create(pk=1)
         return obj
 
+    # Reads the row once per process, then again only after a save anywhere
+    # has bumped the version in the shared cache, which is checked at most
+    # once per request
+    @classmethod
+    def get_cached(cls):
+        version = versions.get_version(cls.VERSION_NAME)
+        if cls.cached_instance == None or cls.cached_version != version:
+            cls.cached_instance = cls.create()
+            cls.cached_version = version
+        return cls.cached_instance
+
     @classmethod
     def get_duedateoffset(cls):
-        instance = cls.create()
+        instance = cls.get_cached()
         return instance.duedateoffset
 
     @classmethod
     def get_senior_assignment(cls):
-        instance = cls.create()
+        instance = cls.get_cached()
         return instance.allow_senior_assignment
 
 
@@ -45,6 +65,24 @@ class AuthorizedUsername(models.Model):
     def authorize_username(cls, username: str):
         return cls.objects.get_or_create(username=username)
 
+    # Returns the (added, skipped) usernames, skipping those already authorized
+    @classmethod
+    def authorize_usernames(cls, usernames: list):
+        usernames = sorted(set(usernames))
+        existing = set(
+            cls.objects.filter(username__in=usernames).values_list(
+                "username", flat=True
+            )
+        )
+        added = [username for username in usernames if username not in existing]
+        # Names authorized by someone else in the meantime are simply ignored
+        cls.objects.bulk_create(
+            [cls(username=username) for username in added],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        return added, sorted(existing)
+
     @classmethod
     def unauthorize_pk(cls, pk):
         cls.objects.filter(pk=pk).delete()
@@ -77,11 +77,11 @@ class SignupView(FormView):
         user = form.save()
 
         level = form.cleaned_data.get("level")
-        level_instance = Level.levels.get_by_number(level)
+        level_instance = Level.get_registry().get_by_number(level)
 
         Senior.objects.get_or_create(user=user, level=level_instance)
         user.save()
-        login(self.request, user)
+        login(self.request, user, backend="users.backends.SeniorBackend")
 
         return redirect("dashboard")
 
@@ -148,7 +148,6 @@ class AuthorizedEmailFormView(LoginRequiredMixin, UserPassesTestMixin, FormView)
         if form.has_changed():
             # form.save method was expanded to include request for messaging
             form.save(self.request)
-            messages.success(self.request, "Usernames Added Successfully.")
         return redirect("authusername")
 
 